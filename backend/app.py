@@ -3,65 +3,38 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
+# Record per-module import times from here on (see GET /health/startup)
+from backend.services.startup_timing import startup_timer
+startup_timer.install_import_hook()
+
 import asyncio
 from bson import ObjectId
-import numbers
-import numpy as np
-from datetime import datetime, date
+from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import Dict, Any, List, Optional
 
-# --------------------------
-# BSON / numpy serializer
-# --------------------------
-def serialize_bson(obj):
-    """
-    Recursively convert Mongo/BSON types into JSON-serializable types:
-    - ObjectId -> str
-    - datetime -> preserved as datetime for Mongo sorting
-    - date -> isoformat string
-    - numpy scalars -> native python types
-    - dict/list -> recursively processed
-    """
-    if isinstance(obj, ObjectId):
-        return str(obj)
-
-    # IMPORTANT: Keep datetime as datetime for Mongo & sorting
-    if isinstance(obj, datetime):
-        return obj
-    if isinstance(obj, date):
-        return obj.isoformat()
-
-    if isinstance(obj, (np.integer, np.int64, np.int32)):  # type: ignore[arg-type]
-        return int(obj)
-    if isinstance(obj, (np.floating, np.float64, np.float32)):  # type: ignore[arg-type]
-        return float(obj)
-    if isinstance(obj, np.bool_):  # type: ignore[arg-type]
-        return bool(obj)
-
-    if isinstance(obj, (str, bool, type(None), numbers.Number)):
-        return obj
-
-    if isinstance(obj, dict):
-        return {str(k): serialize_bson(v) for k, v in obj.items()}
-
-    if isinstance(obj, (list, tuple)):
-        return [serialize_bson(v) for v in obj]
-
-    try:
-        return str(obj)
-    except Exception:
-        return None
-
 # --------------------------
 # FastAPI & imports
 # --------------------------
-from fastapi import FastAPI, Body, HTTPException
+from fastapi import FastAPI, Body, HTTPException, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 # Use absolute imports (backend package) so uvicorn backend.app:app works reliably
-from backend.services.mongo_client import symptom_col, water_col, prediction_col, raw_col
-from backend.services.predictor import predict_disease, _model as LOADED_MODEL
+from backend.services.serialization import serialize_bson  # re-exported for older imports
+from backend.services.mongo_client import symptom_col, water_col, prediction_col, raw_col, mark_district_summary_stale, ensure_indexes
+from backend.services.water_stats import record_water_quality
+from backend.services.pagination import paginate, set_next_cursor, NEXT_CURSOR_HEADER
+from backend.auth.utils import calibrate_bcrypt_rounds_async
+from backend.auth.tokens import revocation_sync_loop
+from backend.services.regions import backfill_region_keys
+from backend.services.alert_dispatcher import outbox_worker_loop, resume_interrupted_enqueues, ALERT_EMAIL_CONCURRENCY
+from backend.services.audit_sink import audit_sink
+from backend.services.predictor import predict_disease, is_model_ready, get_active_version
+from backend.services.model_registry import start_model_service, shadow_flush_loop
+from backend.services.inference_metrics import inference_metrics
+from backend.services.shadow import shadow_evaluator
 from backend.services.merger import merge_and_predict_and_store
 from backend.auth.routes import router as auth_router
 from backend.auth.otp_routes import router as otp_router
@@ -73,12 +46,25 @@ from backend.routes.hotspots import router as hotspots_router
 from backend.routes.heatmap import router as heatmap_router
 from backend.routes.district_stats import router as district_router
 from backend.routes.prediction_outbreaks import router as prediction_outbreaks_router
+from backend.routes.export import router as export_router
+from backend.routes.model_admin import router as model_admin_router
+from backend.routes.prediction_labels import router as prediction_labels_router
 
 # CONFIG
 POLL_INTERVAL_SECONDS = int(os.getenv("POLL_INTERVAL_SECONDS", "5"))
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background = await startup_tasks()
+    # the report is printed once the model service is ready too
+    startup_timer.mark_ready()
+    try:
+        yield
+    finally:
+        await shutdown_tasks(background)
+
 # FastAPI init
-app = FastAPI(title="Nirogya ML Backend (modular)")
+app = FastAPI(title="Nirogya ML Backend (modular)", lifespan=lifespan)
 
 # CORS - allow dev origins; change to explicit origins in production
 origins = [
@@ -91,6 +77,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # mount auth routes
@@ -104,9 +91,9 @@ app.include_router(heatmap_router)
 app.include_router(hotspots_router)
 app.include_router(district_router)
 app.include_router(prediction_outbreaks_router)
-
-# ML availability flag
-ML_READY = True if LOADED_MODEL is not None else False
+app.include_router(export_router)
+app.include_router(model_admin_router)
+app.include_router(prediction_labels_router)
 
 # --------------------------
 # Pydantic model for /predict
@@ -199,6 +186,12 @@ async def save_report(payload: Dict[str, Any] = Body(...)):
         wid = str(res2.inserted_id)
         result["water_saved"] = True
 
+        try:
+            await record_water_quality(doc2)
+        except Exception as e:
+            print("record_water_quality error:", e)
+        await mark_district_summary_stale(doc2.get("district"))
+
         loc = doc2.get("location")
         if loc:
             asyncio.create_task(schedule_processing_by_location(loc))
@@ -218,7 +211,7 @@ async def predict_endpoint(payload: Report):
     raw_doc.setdefault("timestamp", datetime.utcnow().isoformat())
     await raw_col.insert_one(raw_doc)
 
-    if not ML_READY:
+    if not is_model_ready():
         raise HTTPException(status_code=503, detail="Model not loaded")
 
     location = payload.location or "Unknown"
@@ -246,15 +239,17 @@ async def predict_endpoint(payload: Report):
 
     # run predict_disease in threadpool (predict_disease is CPU-bound / sync)
     loop = asyncio.get_running_loop()
-    result = await loop.run_in_executor(None, predict_disease, water_doc, sym_doc)
+    result = await loop.run_in_executor(None, predict_disease, water_doc, sym_doc, "/predict")
 
     pred_doc = {
         "location": payload.location,
         "timestamp": datetime.utcnow(),
         "input": payload.dict(),
-        "prediction": result
+        "prediction": result,
+        "model_version": result.get("model_version")
     }
     await prediction_col.insert_one(pred_doc)
+    await mark_district_summary_stale(district)
 
     return {"prediction": result}
 
@@ -281,8 +276,8 @@ async def schedule_processing_by_location(location: str):
     except Exception as e:
         print("schedule_processing_by_location error:", e)
 
-async def try_match_and_predict(sym_doc: Dict[str, Any]):
-    if not ML_READY:
+async def try_match_and_predict(sym_doc: Dict[str, Any], caller: str = "merger"):
+    if not is_model_ready():
         # Model not loaded, skip gracefully
         return None
     
@@ -302,7 +297,7 @@ async def try_match_and_predict(sym_doc: Dict[str, Any]):
         return None
 
     try:
-        return await merge_and_predict_and_store(sym_doc, water_doc)
+        return await merge_and_predict_and_store(sym_doc, water_doc, caller)
     except Exception as e:
         print("try_match_and_predict error:", e)
         return None
@@ -319,7 +314,7 @@ async def poller_loop():
                 sid = str(sym.get("_id"))
                 if sid in seen_temp:
                     continue
-                await try_match_and_predict(sym)
+                await try_match_and_predict(sym, caller="poller")
                 seen_temp.add(sid)
 
             if len(seen_temp) > 10000:
@@ -330,32 +325,100 @@ async def poller_loop():
 
         await asyncio.sleep(POLL_INTERVAL_SECONDS)
 
-@app.on_event("startup")
-async def startup_tasks():
+async def startup_tasks() -> List[asyncio.Task]:
+    """Run start-up initialization; returns the background tasks to cancel on shutdown."""
+    async with startup_timer.stage("ensure_indexes"):
+        try:
+            await ensure_indexes()
+        except Exception as e:
+            print("ensure_indexes error:", e)
+
+    async with startup_timer.stage("bcrypt_calibration"):
+        try:
+            rounds = await calibrate_bcrypt_rounds_async()
+            print(f"bcrypt cost factor = {rounds}")
+        except Exception as e:
+            print("bcrypt calibration error:", e)
+
+    async with startup_timer.stage("backfill_region_keys"):
+        try:
+            updated = await backfill_region_keys()
+            if updated:
+                print(f"Backfilled region_keys for {updated} users")
+        except Exception as e:
+            print("backfill_region_keys error:", e)
+
+    # buffered audit-log writer
+    async with startup_timer.stage("audit_sink"):
+        await audit_sink.start()
+
+    background = []
+
+    # model service: loads the active model in a thread, then follows promotions
+    startup_timer.expect("model_service")
+    background.append(asyncio.create_task(start_model_service()))
+    # candidate-model agreement stats -> model_shadow_stats
+    background.append(asyncio.create_task(shadow_flush_loop()))
+
+    # keep the in-memory token revocation set in sync across workers
+    background.append(asyncio.create_task(revocation_sync_loop()))
+
+    # alert delivery: finish interrupted enqueues, then work the outbox
+    background.append(asyncio.create_task(resume_interrupted_enqueues()))
+    for i in range(ALERT_EMAIL_CONCURRENCY):
+        background.append(asyncio.create_task(outbox_worker_loop(i)))
+
     # start the background poller
-    asyncio.create_task(poller_loop())
+    background.append(asyncio.create_task(poller_loop()))
     print("Background poller started.")
-    # optionally print ML readiness
-    print(f"ML_READY = {ML_READY}")
+    return background
+
+async def shutdown_tasks(background: List[asyncio.Task]):
+    # flush buffered audit entries before the process exits
+    await audit_sink.stop()
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    # after the shadow flush loop's final flush
+    shadow_evaluator.shutdown()
+
+@app.get("/health/startup")
+async def startup_report():
+    """Start-up timing: per-module import time and initialization stages."""
+    return {
+        "ml_ready": is_model_ready(),
+        "model_version": get_active_version(),
+        **startup_timer.report(),
+    }
+
+@app.get("/metrics/inference")
+async def inference_stage_metrics(format: str = "json"):
+    """
+    Per-stage inference latency histograms (by stage, model version and caller)
+    for this worker. format=prometheus returns the Prometheus text format.
+    """
+    if format == "prometheus":
+        return PlainTextResponse(inference_metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
+    return {"model_version": get_active_version(), "stages": inference_metrics.snapshot()}
 
 # --------------------------
 # Convenience Endpoints
 # --------------------------
 @app.get("/predictions")
-async def list_predictions(limit: int = 50):
-    cursor = prediction_col.find().sort("features.predicted_at", -1).limit(limit)
-    out = []
-    async for d in cursor:
-        out.append(serialize_bson(d))
-    return out
+async def list_predictions(response: Response, limit: int = 50, cursor: Optional[str] = None):
+    docs, next_cursor = await paginate(
+        prediction_col, {}, "features.predicted_at", -1, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
+    return [serialize_bson(d) for d in docs]
 
 @app.get("/water_reports")
-async def get_water_reports(limit: int = 50):
-    cursor = water_col.find().sort("created_at", -1).limit(limit)
-    docs = []
-    async for d in cursor:
-        docs.append(serialize_bson(d))
-    return docs
+async def get_water_reports(response: Response, limit: int = 50, cursor: Optional[str] = None):
+    docs, next_cursor = await paginate(
+        water_col, {}, "created_at", -1, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
+    return [serialize_bson(d) for d in docs]
 
 ############################################################
 # OUTBREAK DETECTION ENDPOINT
@@ -6,11 +6,12 @@ from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel
 from datetime import datetime
 from typing import List, Optional
-import asyncio
+from bson import ObjectId
 
 from backend.services.mongo_client import users_col, alerts_col
-from backend.services.email_service import send_water_alert_email
-from backend.auth.deps import get_current_user
+from backend.services.alert_dispatcher import enqueue_alert_recipients, get_alert_delivery_progress
+from backend.services.regions import region_recipient_query, region_keys_from_text
+from backend.auth.deps import get_current_user, get_token_user
 
 router = APIRouter(prefix="/api/alerts", tags=["alerts"])
 
@@ -32,67 +33,22 @@ class AlertResponse(BaseModel):
     created_at: datetime
     emails_sent: int
     status: str
+    recipient_count: Optional[int] = None
 
 
-async def send_alerts_to_region_users(alert_id: str, alert_data: dict, region: str):
+async def send_alerts_to_region_users(alert_id: str, region: str):
     """
-    Background task to send emails to all users in a region.
+    Background task that queues one outbox row per user in the region.
+    The outbox workers (started with the app) deliver the emails, retry
+    failures and resume after a restart.
     """
     try:
-        # Find users in the affected region
-        # Match by: location field, district, region, or any field containing the region name
-        users_cursor = users_col.find({
-            "$or": [
-                {"location": {"$regex": region, "$options": "i"}},
-                {"district": {"$regex": region, "$options": "i"}},
-                {"region": {"$regex": region, "$options": "i"}},
-                {"address": {"$regex": region, "$options": "i"}}
-            ]
-        })
-        
-        users = await users_cursor.to_list(length=1000)
-        
-        print(f"[ALERT] Found {len(users)} users in region: {region}")
-        
-        sent_count = 0
-        failed_count = 0
-        
-        for user in users:
-            email = user.get("email")
-            if email:
-                try:
-                    success = send_water_alert_email(email, alert_data)
-                    if success:
-                        sent_count += 1
-                    else:
-                        failed_count += 1
-                except Exception as e:
-                    print(f"[ALERT ERROR] Failed to send to {email}: {e}")
-                    failed_count += 1
-                
-                # Small delay to avoid rate limiting (100ms)
-                await asyncio.sleep(0.1)
-        
-        # Update alert with sent count
-        from bson import ObjectId
-        await alerts_col.update_one(
-            {"_id": ObjectId(alert_id)},
-            {
-                "$set": {
-                    "emails_sent": sent_count,
-                    "emails_failed": failed_count,
-                    "status": "sent",
-                    "completed_at": datetime.utcnow()
-                }
-            }
-        )
-        
-        print(f"[ALERT] Completed: {sent_count} sent, {failed_count} failed")
+        total = await enqueue_alert_recipients(alert_id, region)
+        print(f"[ALERT] Queued {total} recipients for region: {region}")
         
     except Exception as e:
         print(f"[ALERT ERROR] Background task failed: {e}")
         # Update alert status to failed
-        from bson import ObjectId
         await alerts_col.update_one(
             {"_id": ObjectId(alert_id)},
             {"$set": {"status": "failed", "error": str(e)}}
@@ -146,26 +102,20 @@ async def create_water_alert(
         "created_at": datetime.utcnow(),
         "emails_sent": 0,
         "emails_failed": 0,
-        "status": "pending"
+        # enqueuing until every recipient is in the outbox (resumed on restart)
+        "status": "enqueuing"
     }
     
+    recipient_count = await users_col.count_documents(region_recipient_query(payload.region))
+    alert_doc["recipient_count"] = recipient_count
+    
     result = await alerts_col.insert_one(alert_doc)
     alert_id = str(result.inserted_id)
     
-    # Prepare alert data for emails
-    email_alert_data = {
-        "region": payload.region,
-        "title": payload.title,
-        "description": payload.description,
-        "severity": payload.severity.lower(),
-        "issued_by": current_user.get("full_name", "Health Department")
-    }
-    
-    # Send emails in background (non-blocking)
+    # Queue emails in background (non-blocking)
     background_tasks.add_task(
         send_alerts_to_region_users, 
         alert_id, 
-        email_alert_data, 
         payload.region
     )
     
@@ -178,14 +128,28 @@ async def create_water_alert(
         created_by=current_user.get("full_name", "Unknown"),
         created_at=alert_doc["created_at"],
         emails_sent=0,
-        status="sending"
+        status="sending",
+        recipient_count=recipient_count
     )
 
 
+@router.get("/recipients/preview")
+async def preview_alert_recipients(
+    region: str,
+    current_user: dict = Depends(get_token_user)
+):
+    """Instant count of users an alert for this region would reach."""
+    return {
+        "region": region,
+        "region_keys": region_keys_from_text(region),
+        "recipient_count": await users_col.count_documents(region_recipient_query(region)),
+    }
+
+
 @router.get("/list")
 async def list_alerts(
     limit: int = 20,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_token_user)
 ):
     """Get recent water alerts."""
     alerts_cursor = alerts_col.find().sort("created_at", -1).limit(limit)
@@ -203,6 +167,7 @@ async def list_alerts(
             "created_at": alert.get("created_at"),
             "emails_sent": alert.get("emails_sent", 0),
             "emails_failed": alert.get("emails_failed", 0),
+            "recipients_queued": alert.get("recipients_queued", 0),
             "status": alert.get("status", "unknown")
         }
         for alert in alerts
@@ -212,11 +177,9 @@ async def list_alerts(
 @router.get("/{alert_id}")
 async def get_alert(
     alert_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_token_user)
 ):
     """Get a specific alert by ID."""
-    from bson import ObjectId
-    
     try:
         alert = await alerts_col.find_one({"_id": ObjectId(alert_id)})
     except Exception:
@@ -237,6 +200,9 @@ async def get_alert(
         "completed_at": alert.get("completed_at"),
         "emails_sent": alert.get("emails_sent", 0),
         "emails_failed": alert.get("emails_failed", 0),
+        "recipients_queued": alert.get("recipients_queued", 0),
+        "progress_updated_at": alert.get("progress_updated_at"),
         "status": alert.get("status", "unknown"),
-        "error": alert.get("error")
+        "error": alert.get("error"),
+        "delivery": await get_alert_delivery_progress(alert)
     }
@@ -1,42 +1,99 @@
 # backend/auth/deps.py
+import os
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from .utils import decode_token
+from .tokens import decode_token_cached, is_revoked, token_digest
 from backend.services.mongo_client import users_col
+from backend.services.cache import TTLCache
 from bson import ObjectId
 
 security = HTTPBearer()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+# Principal records keyed by user id. Writes to a user must call
+# invalidate_cached_user() so role/status changes apply immediately.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+_user_cache = TTLCache(maxsize=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_cached_user(user_id: str):
+    """Drop a user's cached principal record (call after any update to the user)."""
+    _user_cache.pop(str(user_id))
+
+
+async def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """
-    Verifies Bearer token, decodes it and loads user from DB.
-    Raises 401 if token invalid or user not found.
-    Returns the user document (dict).
+    Verifies the Bearer token and returns its claims.
+    Verification results are cached per token until the token expires.
+    Raises 401 if the token is missing, invalid or expired.
     """
     token = credentials.credentials
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
 
     try:
-        payload = decode_token(token)
+        payload = decode_token_cached(token)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
 
-    sub = payload.get("sub")
-    if not sub:
+    if not payload.get("sub"):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    # Load user from DB
-    try:
-        user = await users_col.find_one({"_id": ObjectId(sub)})
-    except Exception:
-        user = None
+    return payload
+
+
+async def require_unrevoked_token(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    payload: dict = Depends(get_token_claims),
+) -> dict:
+    """
+    Rejects tokens revoked by logout or a password reset.
+    Returns the verified claims.
+    """
+    if is_revoked(token_digest(credentials.credentials), payload):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+    return payload
 
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
-    # convert ObjectId -> str and return
-    user["id"] = str(user["_id"])
-    user.pop("password", None)
-    return user
+async def get_current_user(payload: dict = Depends(require_unrevoked_token)) -> dict:
+    """
+    Verifies Bearer token, decodes it and loads user from DB.
+    The user record is served from a short-lived cache when available.
+    Raises 401 if token invalid or user not found.
+    Returns the user document (dict).
+    """
+    sub = payload["sub"]
+
+    user = _user_cache.get(sub)
+    if user is None:
+        # Load user from DB
+        try:
+            user = await users_col.find_one({"_id": ObjectId(sub)})
+        except Exception:
+            user = None
+
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+        # convert ObjectId -> str
+        user["id"] = str(user["_id"])
+        user.pop("password", None)
+        _user_cache.set(sub, user)
+
+    # return a copy so callers can't mutate the cached record
+    return dict(user)
+
+
+async def get_token_user(payload: dict = Depends(require_unrevoked_token)) -> dict:
+    """
+    Read-only variant of get_current_user that trusts the signed token claims
+    (sub, email, role) instead of loading the user. Use only on routes that
+    don't need fresh profile or status data.
+    """
+    return {
+        "id": payload["sub"],
+        "email": payload.get("email"),
+        "role": payload.get("role"),
+    }
@@ -6,13 +6,32 @@ from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import hmac
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 from backend.services.mongo_client import users_col, otp_col
 from backend.services.email_service import generate_otp, send_otp_email
-from backend.auth.utils import create_access_token
+from backend.auth.utils import create_access_token, JWT_SECRET
 
 router = APIRouter(prefix="/api/auth/otp", tags=["otp-auth"])
 
+OTP_EXPIRES_MINUTES = 5
+
+# Limits live on the OTP document itself, so they hold across all workers:
+# one new code per email per OTP_REQUEST_INTERVAL_SECONDS (the unique
+# partial index on live codes rejects a second one) and OTP_MAX_ATTEMPTS
+# verification attempts per code.
+OTP_REQUEST_INTERVAL_SECONDS = 60
+OTP_MAX_ATTEMPTS = 5
+
+
+def hash_otp(email: str, otp: str) -> str:
+    """Keyed hash of the code so stored OTPs can't be read back from the database."""
+    return hmac.new(JWT_SECRET.encode(), f"{email}:{otp}".encode(), hashlib.sha256).hexdigest()
+
 
 class RequestOTPRequest(BaseModel):
     email: EmailStr
@@ -45,38 +64,40 @@ async def request_otp(payload: RequestOTPRequest):
             detail="Email not registered. Please register first."
         )
     
-    # Check for rate limiting - no more than 1 OTP per minute
-    recent_otp = await otp_col.find_one({
-        "email": email,
-        "created_at": {"$gt": datetime.utcnow() - timedelta(minutes=1)}
-    })
-    
-    if recent_otp:
+    # Generate new OTP
+    otp = generate_otp()
+    now = datetime.utcnow()
+    expires_at = now + timedelta(minutes=OTP_EXPIRES_MINUTES)
+    
+    # Single write: replaces an unused OTP for this email older than the
+    # request interval, so older codes stop working. If a newer one exists the
+    # filter misses and the upsert collides with the unique live-code index:
+    # that's the rate limit, enforced by Mongo for every worker. The TTL index
+    # on expires_at removes the document afterwards.
+    try:
+        await otp_col.update_one(
+            {
+                "email": email,
+                "used": False,
+                "created_at": {"$lte": now - timedelta(seconds=OTP_REQUEST_INTERVAL_SECONDS)},
+            },
+            {
+                "$set": {
+                    "user_id": str(user["_id"]),
+                    "otp_hash": hash_otp(email, otp),
+                    "expires_at": expires_at,
+                    "created_at": now,
+                    "attempts": 0,
+                }
+            },
+            upsert=True
+        )
+    except DuplicateKeyError:
         raise HTTPException(
             status_code=429,
             detail="Please wait 1 minute before requesting another OTP"
         )
     
-    # Invalidate any existing unused OTPs for this email
-    await otp_col.update_many(
-        {"email": email, "used": False},
-        {"$set": {"used": True, "invalidated_at": datetime.utcnow()}}
-    )
-    
-    # Generate new OTP
-    otp = generate_otp()
-    expires_at = datetime.utcnow() + timedelta(minutes=5)
-    
-    # Save OTP to database
-    await otp_col.insert_one({
-        "email": email,
-        "user_id": str(user["_id"]),
-        "otp_code": otp,  # In production, you might want to hash this
-        "expires_at": expires_at,
-        "used": False,
-        "created_at": datetime.utcnow()
-    })
-    
     # Send OTP email
     email_sent = send_otp_email(email, otp)
     
@@ -86,7 +107,7 @@ async def request_otp(payload: RequestOTPRequest):
             detail="Failed to send OTP email. Please try again."
         )
     
-    return OTPResponse(message="OTP sent to your email", expires_in_minutes=5)
+    return OTPResponse(message="OTP sent to your email", expires_in_minutes=OTP_EXPIRES_MINUTES)
 
 
 @router.post("/verify")
@@ -95,27 +116,40 @@ async def verify_otp(payload: VerifyOTPRequest):
     Verify OTP and return JWT token for login.
     """
     email = payload.email.lower().strip()
+    now = datetime.utcnow()
+    invalid = HTTPException(
+        status_code=400,
+        detail="Invalid or expired OTP. Please request a new one."
+    )
     
-    # Find valid OTP
-    otp_record = await otp_col.find_one({
-        "email": email,
-        "otp_code": payload.otp,
-        "used": False,
-        "expires_at": {"$gt": datetime.utcnow()}
-    })
-    
-    if not otp_record:
+    # Count the attempt on the live code first (shared by all workers)
+    live = await otp_col.find_one_and_update(
+        {"email": email, "used": False, "expires_at": {"$gt": now}},
+        {"$inc": {"attempts": 1}},
+        projection={"attempts": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not live:
+        raise invalid
+    if live.get("attempts", 0) > OTP_MAX_ATTEMPTS:
         raise HTTPException(
-            status_code=400,
-            detail="Invalid or expired OTP. Please request a new one."
+            status_code=429,
+            detail="Too many attempts. Please request a new OTP."
         )
     
-    # Mark OTP as used
-    await otp_col.update_one(
-        {"_id": otp_record["_id"]},
-        {"$set": {"used": True, "used_at": datetime.utcnow()}}
+    # Then mark it used in one atomic write, if the code matches
+    otp_record = await otp_col.find_one_and_update(
+        {
+            "_id": live["_id"],
+            "used": False,
+            "otp_hash": hash_otp(email, payload.otp.strip()),
+        },
+        {"$set": {"used": True, "used_at": now}}
     )
     
+    if not otp_record:
+        raise invalid
+    
     # Get user
     user = await users_col.find_one({"email": email})
     if not user:
@@ -16,9 +16,13 @@ from backend.auth.models import (
     AdminCreateGovernmentUserRequest,
     AdminCreatedUserResponse,
 )
-from backend.auth.utils import hash_password, verify_password, create_access_token
-from backend.auth.deps import get_current_user
+from backend.auth.utils import hash_password_async, verify_password_async, create_access_token
+from backend.auth.deps import get_current_user, require_unrevoked_token, security
+from backend.auth.tokens import revoke_token
+from fastapi.security import HTTPAuthorizationCredentials
 from backend.services.mongo_client import users_col, create_or_update_asha_on_register, create_or_update_admin_on_register
+from backend.services.regions import region_keys_for_user
+from backend.services.counters import invalidate_user_counts
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -103,7 +107,7 @@ async def register(payload: RegisterRequest):
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed = hash_password(payload.password)
+    hashed = await hash_password_async(payload.password)
 
     # Force public signup role to community user for safety
     role = "community_user"
@@ -119,7 +123,10 @@ async def register(payload: RegisterRequest):
         "created_at": datetime.utcnow(),
     }
 
+    doc["region_keys"] = region_keys_for_user(doc)
+
     result = await users_col.insert_one(doc)
+    invalidate_user_counts()
     created = await users_col.find_one({"_id": result.inserted_id})
 
     if not created:
@@ -142,7 +149,7 @@ async def login(payload: UserLogin):
 
     stored_hash = user.get("password", "")
 
-    ok = verify_password(payload.password, stored_hash)
+    ok = await verify_password_async(payload.password, stored_hash)
     if not ok:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
@@ -193,6 +200,19 @@ async def users_me(current_user: dict = Depends(get_current_user)):
     return await me(current_user)
 
 
+# ---------------------------
+# LOGOUT
+# ---------------------------
+@router.post("/logout")
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    claims: dict = Depends(require_unrevoked_token),
+):
+    """Revoke the presented token so it can no longer be used."""
+    await revoke_token(credentials.credentials, claims)
+    return {"message": "Logged out"}
+
+
 # ===========================================================
 #                ADMIN / GOVERNMENT ENDPOINTS
 # ===========================================================
@@ -234,7 +254,7 @@ async def admin_create_asha_worker(
         email = await generate_unique_email(local_part)
 
     temp_password = generate_temp_password()
-    hashed = hash_password(temp_password)
+    hashed = await hash_password_async(temp_password)
 
     doc = {
         "full_name": payload.full_name.strip(),
@@ -247,7 +267,10 @@ async def admin_create_asha_worker(
         "created_at": datetime.utcnow(),
     }
 
+    doc["region_keys"] = region_keys_for_user(doc)
+
     result = await users_col.insert_one(doc)
+    invalidate_user_counts()
     created = await users_col.find_one({"_id": result.inserted_id})
 
     if not created:
@@ -282,7 +305,7 @@ async def admin_create_government_user(
         raise HTTPException(status_code=400, detail="Email already registered")
 
     temp_password = generate_temp_password()
-    hashed = hash_password(temp_password)
+    hashed = await hash_password_async(temp_password)
 
     doc = {
         "full_name": payload.full_name.strip(),
@@ -295,7 +318,10 @@ async def admin_create_government_user(
         "created_at": datetime.utcnow(),
     }
 
+    doc["region_keys"] = region_keys_for_user(doc)
+
     result = await users_col.insert_one(doc)
+    invalidate_user_counts()
     created = await users_col.find_one({"_id": result.inserted_id})
 
     if not created:
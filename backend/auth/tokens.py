@@ -0,0 +1,142 @@
+# backend/auth/tokens.py
+"""
+Verified-token cache and token revocation.
+
+- decode_token_cached(): verifies a JWT once and keeps its claims in an LRU
+  keyed by the token's SHA-256 digest until the token expires.
+- Revocations live in the `revoked_tokens` collection (TTL-expired) and are
+  mirrored into in-memory sets, refreshed by revocation_sync_loop(), so every
+  worker honours logout and password resets without a per-request query.
+    kind="token": a single token (logout), keyed by digest
+    kind="user":  every token for a user issued before not_before_ts (password reset)
+"""
+import asyncio
+import hashlib
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from backend.auth.utils import decode_token, JWT_EXPIRES_MINUTES
+from backend.services.cache import TTLCache
+from backend.services.mongo_client import revoked_tokens_col
+
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+TOKEN_CACHE_MAX_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_MAX_TTL_SECONDS", "900"))
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "10"))
+
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_MAX_ENTRIES, ttl=TOKEN_CACHE_MAX_TTL_SECONDS)
+
+# digest -> token exp (epoch seconds); user_id -> not_before (epoch seconds)
+_revoked_digests: Dict[str, float] = {}
+_revoked_users: Dict[str, float] = {}
+_last_sync: Optional[datetime] = None
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def decode_token_cached(token: str, digest: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Same contract as decode_token (raises jwt errors on bad tokens), but a
+    token that already verified is served from cache until its exp.
+    """
+    digest = digest or token_digest(token)
+    claims = _token_cache.get(digest)
+    if claims is not None:
+        if claims.get("exp", 0) > time.time():
+            return dict(claims)
+        _token_cache.pop(digest)
+
+    claims = decode_token(token)
+    exp = claims.get("exp")
+    if exp:
+        _token_cache.set(digest, claims, ttl=float(exp) - time.time())
+    return dict(claims)
+
+
+def is_revoked(digest: str, claims: Dict[str, Any]) -> bool:
+    if digest in _revoked_digests:
+        return True
+    not_before = _revoked_users.get(str(claims.get("sub")))
+    return not_before is not None and float(claims.get("iat", 0)) < not_before
+
+
+async def revoke_token(token: str, claims: Dict[str, Any]):
+    """Revoke a single token (logout)."""
+    digest = token_digest(token)
+    exp = float(claims.get("exp") or time.time() + JWT_EXPIRES_MINUTES * 60)
+    _revoked_digests[digest] = exp
+    _token_cache.pop(digest)
+
+    await revoked_tokens_col.update_one(
+        {"kind": "token", "digest": digest},
+        {
+            "$set": {
+                "user_id": str(claims.get("sub")),
+                "expires_at": datetime.utcfromtimestamp(exp),
+                "created_at": datetime.utcnow(),
+            }
+        },
+        upsert=True,
+    )
+
+
+async def revoke_user_tokens(user_id: str):
+    """Revoke every token issued to a user up to now (password reset)."""
+    # iat has whole-second resolution, so round up: a token issued earlier in
+    # this second must not survive (one issued later in it is rejected too)
+    not_before = float(math.ceil(time.time()))
+    _revoked_users[str(user_id)] = not_before
+
+    await revoked_tokens_col.update_one(
+        {"kind": "user", "user_id": str(user_id)},
+        {
+            "$set": {
+                "not_before_ts": not_before,
+                # older tokens are expired by then anyway
+                "expires_at": datetime.utcnow() + timedelta(minutes=JWT_EXPIRES_MINUTES),
+                "created_at": datetime.utcnow(),
+            }
+        },
+        upsert=True,
+    )
+
+
+async def load_revocations():
+    """Pull revocations written since the last sync (by any worker) into memory."""
+    global _last_sync
+    started = datetime.utcnow()
+    query = {"created_at": {"$gte": _last_sync}} if _last_sync else {}
+
+    async for doc in revoked_tokens_col.find(query):
+        if doc.get("kind") == "token" and doc.get("digest"):
+            exp = doc.get("expires_at")
+            _revoked_digests[doc["digest"]] = (
+                (exp - datetime(1970, 1, 1)).total_seconds() if exp else time.time()
+            )
+        elif doc.get("kind") == "user" and doc.get("user_id"):
+            _revoked_users[doc["user_id"]] = max(
+                _revoked_users.get(doc["user_id"], 0), float(doc.get("not_before_ts", 0))
+            )
+
+    # forget revoked tokens that have expired on their own
+    now = time.time()
+    for digest in [d for d, exp in _revoked_digests.items() if exp < now]:
+        del _revoked_digests[digest]
+    user_ttl = JWT_EXPIRES_MINUTES * 60
+    for uid in [u for u, nb in _revoked_users.items() if nb + user_ttl < now]:
+        del _revoked_users[uid]
+
+    _last_sync = started
+
+
+async def revocation_sync_loop():
+    while True:
+        try:
+            await load_revocations()
+        except Exception as e:
+            print("Revocation sync error:", e)
+        await asyncio.sleep(REVOCATION_SYNC_SECONDS)
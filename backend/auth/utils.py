@@ -5,12 +5,31 @@ from typing import Optional, Tuple, Dict, Any
 import secrets
 import string
 
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 import jwt  # PyJWT
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is CPU-bound (~250 ms per call), so request handlers hash/verify on a
+# dedicated bounded pool and get a fast 503 when too much work is queued.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+# Start-up calibration: pick the bcrypt cost whose hash time is closest to
+# (without exceeding) the target. BCRYPT_ROUNDS pins the cost instead.
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 14
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash")
+_hash_pending = 0
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -20,6 +39,56 @@ def verify_password(plain: str, hashed: str) -> bool:
     except Exception:
         return False
 
+async def _run_hasher(fn, *args):
+    """Run fn on the password pool, rejecting immediately when it is saturated."""
+    global _hash_pending
+    if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hasher(hash_password, password)
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await _run_hasher(verify_password, plain, hashed)
+
+def calibrate_bcrypt_rounds(target_ms: float = BCRYPT_TARGET_MS) -> int:
+    """
+    Measure bcrypt on this host and set the default cost factor so one hash
+    takes at most target_ms (each extra round doubles the cost).
+    Existing hashes keep verifying with the cost stored inside them.
+    """
+    pinned = os.getenv("BCRYPT_ROUNDS")
+    if pinned:
+        rounds = int(pinned)
+    else:
+        probe_rounds = BCRYPT_MIN_ROUNDS
+        probe = CryptContext(schemes=["bcrypt"], bcrypt__rounds=probe_rounds)
+        start = time.perf_counter()
+        probe.hash("calibration-probe")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        rounds = probe_rounds
+        while rounds < BCRYPT_MAX_ROUNDS and elapsed_ms * 2 <= target_ms:
+            elapsed_ms *= 2
+            rounds += 1
+
+    pwd_context.update(bcrypt__rounds=rounds)
+    return rounds
+
+async def calibrate_bcrypt_rounds_async() -> int:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, calibrate_bcrypt_rounds)
+
 def generate_temp_password(length: int = 10) -> str:
     """Generate a strong temporary password"""
     chars = string.ascii_letters + string.digits + "!@#$%^&*"
@@ -0,0 +1,13 @@
+# backend/benchmarks/__init__.py
+"""
+Inference benchmark suite for the predictor service.
+
+    python -m backend.benchmarks [--version v3] [--output bench.json]
+                                 [--baseline previous.json --tolerance 0.15]
+
+Measures build_features, predict_disease (cold and cached), the DataFrame vs
+fast single-row paths and the compiled backend, batch scoring at several batch
+sizes, cold model load time and resident memory per backend, on reproducible synthetic inputs drawn from the
+training CSV. Results are JSON; with --baseline the run exits non-zero when a
+median latency regresses past the tolerance.
+"""
@@ -0,0 +1,166 @@
+# backend/benchmarks/__main__.py
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from backend.benchmarks.inputs import REPO_DIR, synthetic_inputs
+from backend.benchmarks.timing import summarize, time_calls
+from backend.services import predictor
+from backend.services.prediction_cache import prediction_cache
+
+BATCH_SIZES = [1, 8, 32, 128, 512]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def bench_cold_load(version, backend="catboost"):
+    """Model load in a fresh interpreter, so imports and memory are really cold."""
+    proc = subprocess.run(
+        [sys.executable, "-m", "backend.benchmarks.cold_load", version, backend],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def bench_batches(bundle, feats, repeat):
+    import pandas as pd
+
+    results = {}
+    for size in BATCH_SIZES:
+        batches = [
+            (pd.DataFrame(feats[i:i + size], columns=bundle.feature_cols),)
+            for i in range(0, len(feats) - size + 1, size)
+        ] or [(pd.DataFrame(feats[:size], columns=bundle.feature_cols),)]
+        summary = summarize(time_calls(bundle.model.predict, batches, repeat))
+        summary["rows_per_second"] = round(size / (summary["p50_us"] / 1e6), 1)
+        summary["per_row_p50_us"] = round(summary["p50_us"] / size, 3)
+        results[str(size)] = summary
+    return results
+
+
+def run(version, n_inputs, repeat, seed):
+    bundle = predictor.load_and_activate(version, backend="catboost")  # loads + warms up
+    docs = synthetic_inputs(n_inputs, seed=seed)
+    feats = [predictor.build_features(w, s) for w, s in docs]
+    doc_inputs = [(w, s) for w, s in docs]
+
+    results = {
+        "build_features": summarize(time_calls(predictor.build_features, doc_inputs, repeat)),
+        # every call misses the prediction cache
+        "predict_disease": summarize(
+            time_calls(predictor.predict_disease, doc_inputs, repeat, setup=prediction_cache.clear)
+        ),
+    }
+    # every call hits it
+    for w, s in doc_inputs:
+        predictor.predict_disease(w, s)
+    results["predict_disease_cached"] = summarize(time_calls(predictor.predict_disease, doc_inputs, repeat))
+
+    results["single_row_dataframe_path"] = summarize(time_calls(
+        lambda f: predictor._predict_index_dataframe(bundle, f), [(f,) for f in feats], repeat
+    ))
+    if bundle.fast_path:
+        results["single_row_fast_path"] = summarize(time_calls(
+            lambda f: predictor._predict_index_fast(bundle, predictor.feature_row(f, bundle.feature_cols)),
+            [(f,) for f in feats], repeat,
+        ))
+
+    results["batch"] = bench_batches(bundle, feats, repeat)
+    results["cold_load"] = bench_cold_load(version)
+
+    # compiled backend (CatBoost standalone export), if it builds and passes parity
+    compiled_bundle = predictor.load_bundle(version, backend="compiled")
+    if compiled_bundle.compiled is not None:
+        compiled = compiled_bundle.compiled
+        rows = [(predictor.feature_row(f, bundle.feature_cols),) for f in feats]
+        mismatches = sum(
+            compiled.predict_index(r) != predictor._predict_index_dataframe(bundle, f)
+            for (r,), f in zip(rows, feats)
+        )
+        results["single_row_compiled"] = summarize(time_calls(compiled.predict_index, rows, repeat))
+        results["single_row_compiled"]["mismatches"] = mismatches
+        results["cold_load_compiled"] = bench_cold_load(version, "compiled")
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "model_version": bundle.version,
+            "fast_path": bundle.fast_path,
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "inputs": n_inputs,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Latency metrics whose p50 grew by more than `tolerance` (fraction) vs the baseline."""
+    regressions = []
+
+    def walk(cur, base, path):
+        for key, value in cur.items():
+            if key not in base:
+                continue
+            if isinstance(value, dict):
+                walk(value, base[key], f"{path}.{key}" if path else key)
+            elif key == "p50_us" and base[key] > 0 and value > base[key] * (1 + tolerance):
+                regressions.append({"metric": path, "baseline_p50_us": base[key], "p50_us": value,
+                                    "change": round(value / base[key] - 1, 3)})
+
+    walk(current["results"], baseline["results"], "")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks")
+    parser.add_argument("--version", default=None, help="registry version (default: active pointer)")
+    parser.add_argument("--inputs", type=int, default=1024, help="synthetic inputs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="write JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=None, help="previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed p50 slow-down (fraction)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = run(args.version or predictor.read_active_pointer(), args.inputs, args.repeat, args.seed)
+    report["meta"]["duration_s"] = round(time.perf_counter() - start, 2)
+
+    exit_code = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        report["regressions"] = compare(report, baseline, args.tolerance)
+        if report["regressions"]:
+            exit_code = 1
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    for r in report.get("regressions", []):
+        print(f"REGRESSION {r['metric']}: p50 {r['baseline_p50_us']} -> {r['p50_us']} us (+{r['change']:.0%})",
+              file=sys.stderr)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
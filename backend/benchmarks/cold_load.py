@@ -0,0 +1,69 @@
+# backend/benchmarks/cold_load.py
+"""
+Cold model load, run in a fresh interpreter by the suite:
+
+    python -m backend.benchmarks.cold_load <version> [catboost|compiled]
+
+Prints JSON: import time of the ML stack, artifact load time, warm-up time and
+resident memory before / after loading.
+"""
+import json
+import resource
+import sys
+import time
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # bytes on macOS, KiB elsewhere
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 2)
+
+
+def rss_mb() -> float:
+    """Current resident set size (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * resource.getpagesize() / 2**20, 2)
+    except OSError:
+        return peak_rss_mb()
+
+
+def main(version: str, backend: str = "catboost"):
+    rss_start = rss_mb()
+
+    start = time.perf_counter()
+    import joblib  # noqa: F401
+    import numpy  # noqa: F401
+    if backend == "catboost":
+        import pandas  # noqa: F401
+        import catboost  # noqa: F401
+    import_seconds = time.perf_counter() - start
+    rss_imported = rss_mb()
+
+    from backend.services import predictor
+
+    start = time.perf_counter()
+    bundle = predictor.load_bundle(version, backend)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    start = time.perf_counter()
+    predictor.warm_up(bundle)
+    warm_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "version": bundle.version,
+        "backend": bundle.backend,
+        "import_ms": round(import_seconds * 1000, 2),
+        "load_ms": round(load_seconds * 1000, 2),
+        "warm_up_ms": round(warm_seconds * 1000, 2),
+        "rss_start_mb": rss_start,
+        "rss_after_imports_mb": rss_imported,
+        "rss_after_load_mb": rss_loaded,
+        "model_rss_mb": round(rss_loaded - rss_imported, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], *sys.argv[2:3])
@@ -0,0 +1,63 @@
+# backend/benchmarks/inputs.py
+"""
+Reproducible synthetic inputs drawn from the training CSV distribution.
+
+Each field is sampled from its empirical distribution in the training data
+(categoricals by frequency, readings from the observed values with a small
+jitter) using a seeded RNG, and returned as the (water_doc, symptom_doc) pairs
+predict_disease() receives in production.
+"""
+import csv
+import random
+import statistics
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+TRAINING_CSV = REPO_DIR / "nirogya-ml" / "dataset" / "nirogya_training_dataset.csv"
+
+CATEGORICAL_FIELDS = {"district": "district", "location": "location", "primary_source": "primary_water_source"}
+WATER_FIELDS = ["ph", "turbidity", "tds", "chlorine", "fluoride", "nitrate", "coliform", "temperature"]
+# training column -> symptom name as reported by users
+SYMPTOM_FIELDS = {
+    "diarrhea": "diarrhea",
+    "vomiting": "vomiting",
+    "fever": "fever",
+    "abdominal_pain": "abdominal pain",
+    "dehydration": "dehydration",
+    "headache": "headache",
+}
+JITTER = 0.05  # fraction of the column's standard deviation
+
+
+def load_columns(path: Path = TRAINING_CSV) -> Dict[str, list]:
+    with path.open(newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return {col: [r[col] for r in rows] for col in rows[0]} if rows else {}
+
+
+def synthetic_inputs(n: int, seed: int = 42, path: Path = TRAINING_CSV) -> List[Tuple[dict, dict]]:
+    rng = random.Random(seed)
+    columns = load_columns(path)
+
+    numeric = {}
+    for field in WATER_FIELDS:
+        values = [float(v) for v in columns[field] if v not in ("", None)]
+        numeric[field] = (values, statistics.pstdev(values) * JITTER if len(values) > 1 else 0.0)
+    symptom_rates = {
+        name: sum(int(float(v or 0)) for v in columns[col]) / len(columns[col])
+        for col, name in SYMPTOM_FIELDS.items()
+    }
+
+    docs = []
+    for _ in range(n):
+        w_doc = {target: rng.choice(columns[col]) for col, target in CATEGORICAL_FIELDS.items()}
+        for field, (values, sigma) in numeric.items():
+            w_doc[field] = max(0.0, rng.choice(values) + rng.gauss(0.0, sigma))
+        s_doc = {
+            "district": w_doc["district"],
+            "location": w_doc["location"],
+            "symptoms": [name for name, rate in symptom_rates.items() if rng.random() < rate],
+        }
+        docs.append((w_doc, s_doc))
+    return docs
@@ -0,0 +1,35 @@
+# backend/benchmarks/timing.py
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+
+def time_calls(fn: Callable, inputs: List[tuple], repeat: int = 1,
+               setup: Optional[Callable] = None) -> List[float]:
+    """Per-call wall time in microseconds. setup() runs before each call, untimed."""
+    timings = []
+    for _ in range(repeat):
+        for args in inputs:
+            if setup is not None:
+                setup()
+            start = time.perf_counter_ns()
+            fn(*args)
+            timings.append((time.perf_counter_ns() - start) / 1000)
+    return timings
+
+
+def summarize(timings_us: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings_us)
+    n = len(ordered)
+
+    def pct(p):
+        return ordered[min(n - 1, int(n * p))]
+
+    return {
+        "calls": n,
+        "mean_us": round(statistics.fmean(ordered), 3),
+        "p50_us": round(pct(0.50), 3),
+        "p95_us": round(pct(0.95), 3),
+        "p99_us": round(pct(0.99), 3),
+        "min_us": round(ordered[0], 3),
+    }
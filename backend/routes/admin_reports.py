@@ -5,7 +5,8 @@ Provides comprehensive analytics, system health, audit logs, and data reports
 Only accessible to admin users
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+import asyncio
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 from bson import ObjectId
@@ -13,6 +14,8 @@ from pydantic import BaseModel
 
 from backend.auth.deps import get_current_user
 from backend.services.mongo_client import users_col, audit_logs_col, symptom_col, water_col, prediction_col
+from backend.services.pagination import paginate, set_next_cursor
+from backend.services.counters import get_user_role_status_counts, get_collection_estimates, sum_counts
 
 router = APIRouter(prefix="/api/admin/reports", tags=["admin_reports"])
 
@@ -104,19 +107,26 @@ async def get_summary_statistics(
     """
     await ensure_admin(current_user)
     
+    # One cached group-by over users + metadata-based estimates for the big collections
+    user_counts, estimates = await asyncio.gather(
+        get_user_role_status_counts(),
+        get_collection_estimates(),
+    )
+    
     # User counts
-    total_users = await users_col.count_documents({})
-    active_users = await users_col.count_documents({"status": "active"})
-    inactive_users = await users_col.count_documents({"status": "inactive"})
+    total_users = sum_counts(user_counts)
+    active_users = sum_counts(user_counts, status="active")
+    inactive_users = sum_counts(user_counts, status="inactive")
     
-    # Audit logs count (as proxy for total actions)
-    total_actions = await audit_logs_col.count_documents({})
+    # Audit logs count (as proxy for total actions), approximate
+    total_actions = estimates["audit_logs"]
     
-    # Reports count (symptoms + water quality + predictions)
-    symptom_reports = await symptom_col.count_documents({})
-    water_reports = await water_col.count_documents({})
-    prediction_reports = await prediction_col.count_documents({})
-    total_reports = symptom_reports + water_reports + prediction_reports
+    # Reports count (symptoms + water quality + predictions), approximate
+    total_reports = (
+        estimates["symptom_reports"]
+        + estimates["water_reports"]
+        + estimates["prediction_reports"]
+    )
     
     # System health metrics (simplified - in production would check actual services)
     api_health = 99.8
@@ -208,11 +218,13 @@ async def get_system_health(
 # ---------------------------
 @router.get("/users", response_model=List[UserReport])
 async def get_user_reports(
+    response: Response,
     current_user: dict = Depends(get_current_user),
     role: Optional[str] = Query(None, description="Filter by role"),
     status_filter: Optional[str] = Query(None, description="Filter by status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
 ):
     """
     Get user activity reports with analytics
@@ -227,9 +239,11 @@ async def get_user_reports(
     if status_filter:
         filter_query["status"] = status_filter
     
-    # Get users
-    cursor = users_col.find(filter_query).skip(skip).limit(limit)
-    users = await cursor.to_list(length=limit)
+    # Get users (keyset on _id; skip only applies without a cursor)
+    users, next_cursor = await paginate(
+        users_col, filter_query, "_id", 1, limit=limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
     user_reports = []
     for user in users:
@@ -278,11 +292,13 @@ async def get_user_reports(
 # ---------------------------
 @router.get("/audit-logs", response_model=List[AuditLog])
 async def get_audit_logs(
+    response: Response,
     current_user: dict = Depends(get_current_user),
     action_filter: Optional[str] = Query(None, description="Filter by action"),
     status_filter: Optional[str] = Query(None, description="Filter by status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
 ):
     """
     Get system audit logs
@@ -298,8 +314,10 @@ async def get_audit_logs(
         filter_query["status"] = status_filter
     
     # Get logs
-    cursor = audit_logs_col.find(filter_query).sort("timestamp", -1).skip(skip).limit(limit)
-    logs = await cursor.to_list(length=limit)
+    logs, next_cursor = await paginate(
+        audit_logs_col, filter_query, "timestamp", -1, limit=limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
     audit_logs = []
     for log in logs:
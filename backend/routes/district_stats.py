@@ -1,9 +1,11 @@
 # backend/routes/district_stats.py
+import asyncio
 from fastapi import APIRouter, Query, HTTPException
 from typing import Optional, List
 from datetime import datetime, timedelta
-from backend.services.mongo_client import prediction_col, symptom_col, water_col
-from backend.app import serialize_bson
+from backend.services.mongo_client import prediction_col, symptom_col, water_col, district_summary_col
+from backend.services.water_stats import get_water_quality_stats
+from backend.services.serialization import serialize_bson
 
 router = APIRouter(prefix="/api/districts", tags=["districts"])
 
@@ -11,6 +13,9 @@ router = APIRouter(prefix="/api/districts", tags=["districts"])
 OUTBREAK_THRESHOLD = 20  # 20+ cases => outbreak
 WINDOW_DAYS = 7          # last 7 days only
 
+# Materialized /stats summaries older than this are recomputed even if not marked stale
+SUMMARY_MAX_AGE_SECONDS = 15 * 60
+
 
 @router.get("/")
 async def get_all_districts():
@@ -43,18 +48,15 @@ async def get_all_districts():
     return {"districts": districts}
 
 
-@router.get("/stats")
-async def get_district_stats(
-    district: str = Query(..., description="District name"),
-    days: int = Query(30, description="Number of days to look back")
-):
+async def _compute_district_stats(district: str, days: int) -> dict:
     """
-    Get detailed statistics for a specific district.
+    Build the district stats payload in one round trip per collection:
+    a single $facet over prediction_reports (disease breakdown + daily trend)
+    runs concurrently with the materialized water-quality stats lookup.
     """
     cutoff = datetime.utcnow() - timedelta(days=days)
-    
-    # Disease breakdown
-    disease_pipeline = [
+
+    prediction_pipeline = [
         {
             "$match": {
                 "input_water.district": district,
@@ -62,54 +64,41 @@ async def get_district_stats(
             }
         },
         {
-            "$group": {
-                "_id": "$features.predicted_disease",
-                "count": {"$sum": 1}
+            "$facet": {
+                "disease_breakdown": [
+                    {
+                        "$group": {
+                            "_id": "$features.predicted_disease",
+                            "count": {"$sum": 1}
+                        }
+                    },
+                    {"$sort": {"count": -1}}
+                ],
+                "daily_trend": [
+                    {
+                        "$group": {
+                            "_id": {
+                                "$dateToString": {"format": "%Y-%m-%d", "date": "$features.predicted_at"}
+                            },
+                            "count": {"$sum": 1}
+                        }
+                    },
+                    {"$sort": {"_id": 1}}
+                ]
             }
-        },
-        {"$sort": {"count": -1}}
+        }
     ]
-    
-    disease_results = await prediction_col.aggregate(disease_pipeline).to_list(None)
-    
-    # Daily trend
-    daily_pipeline = [
-        {
-            "$match": {
-                "input_water.district": district,
-                "features.predicted_at": {"$gte": cutoff}
-            }
-        },
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {"format": "%Y-%m-%d", "date": "$features.predicted_at"}
-                },
-                "count": {"$sum": 1}
-            }
-        },
-        {"$sort": {"_id": 1}}
-    ]
-    
-    daily_results = await prediction_col.aggregate(daily_pipeline).to_list(None)
-    
-    # Water quality summary
-    water_pipeline = [
-        {"$match": {"district": district}},
-        {"$sort": {"created_at": -1}},
-        {"$limit": 10}
-    ]
-    
-    water_results = await water_col.aggregate(water_pipeline).to_list(None)
-    
-    avg_ph = 0
-    avg_turbidity = 0
-    if water_results:
-        ph_values = [w.get("pH") or w.get("ph") for w in water_results if w.get("pH") or w.get("ph")]
-        turb_values = [w.get("turbidity") for w in water_results if w.get("turbidity")]
-        avg_ph = sum(ph_values) / len(ph_values) if ph_values else 0
-        avg_turbidity = sum(turb_values) / len(turb_values) if turb_values else 0
-    
+
+    facet_results, water = await asyncio.gather(
+        prediction_col.aggregate(prediction_pipeline).to_list(None),
+        get_water_quality_stats("district", district, start=cutoff),
+    )
+
+    facets = facet_results[0] if facet_results else {}
+    disease_results = facets.get("disease_breakdown", [])
+    daily_results = facets.get("daily_trend", [])
+    water_params = water["parameters"]
+
     return {
         "district": district,
         "period_days": days,
@@ -122,54 +111,154 @@ async def get_district_stats(
             for r in daily_results
         ],
         "water_quality": {
-            "avg_ph": round(avg_ph, 2),
-            "avg_turbidity": round(avg_turbidity, 2),
-            "recent_reports": len(water_results)
+            "avg_ph": round(water_params["ph"]["mean"] or 0, 2),
+            "avg_turbidity": round(water_params["turbidity"]["mean"] or 0, 2),
+            "recent_reports": max(p["count"] for p in water_params.values()),
+            "parameters": water_params
         },
         "total_cases": sum(r["count"] for r in disease_results)
     }
 
 
+@router.get("/stats")
+async def get_district_stats(
+    district: str = Query(..., description="District name"),
+    days: int = Query(30, description="Number of days to look back"),
+    use_summary: bool = Query(True, description="Serve from the materialized district summary when fresh"),
+):
+    """
+    Get detailed statistics for a specific district.
+    Served from district_summaries when a fresh summary exists; otherwise
+    computed in one round trip and written back as the new summary.
+    """
+    summary_key = {"district": district, "period_days": days}
+
+    if use_summary:
+        cached = await district_summary_col.find_one(
+            {
+                **summary_key,
+                "stale": False,
+                "computed_at": {"$gte": datetime.utcnow() - timedelta(seconds=SUMMARY_MAX_AGE_SECONDS)}
+            },
+            projection={"_id": 0, "stats": 1}
+        )
+        if cached:
+            return cached["stats"]
+
+    # Data arriving while we compute bumps stale_generation; only clear the
+    # stale mark if that hasn't happened, so the new data isn't left out
+    existing = await district_summary_col.find_one(summary_key, projection={"stale_generation": 1})
+
+    stats = await _compute_district_stats(district, days)
+
+    update = {"$set": {"stats": stats, "stale": False, "computed_at": datetime.utcnow()}}
+    if existing is None:
+        await district_summary_col.update_one(summary_key, update, upsert=True)
+    else:
+        # a missing stale_generation matches None
+        await district_summary_col.update_one(
+            {**summary_key, "stale_generation": existing.get("stale_generation")}, update
+        )
+
+    return stats
+
+
+@router.get("/water-quality")
+async def get_water_quality(
+    district: Optional[str] = Query(None, description="District name"),
+    location: Optional[str] = Query(None, description="Location / village name"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    days: int = Query(30, description="Number of days to look back when no start_date is given"),
+):
+    """
+    Water-quality statistics (mean, std, percentiles, exceedance rates) for all
+    measured parameters, served from the materialized daily buckets.
+    """
+    if bool(district) == bool(location):
+        raise HTTPException(status_code=400, detail="Provide exactly one of district or location")
+
+    try:
+        end = datetime.fromisoformat(end_date) if end_date else datetime.utcnow()
+        start = datetime.fromisoformat(start_date) if start_date else end - timedelta(days=days)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    if district:
+        return await get_water_quality_stats("district", district, start=start, end=end)
+    return await get_water_quality_stats("location", location, start=start, end=end)
+
+
 @router.get("/comparison")
 async def compare_districts(
-    districts: str = Query(..., description="Comma-separated list of districts"),
-    days: int = Query(30, description="Number of days to look back")
+    districts: Optional[str] = Query(None, description="Comma-separated list of districts"),
+    days: int = Query(30, description="Number of days to look back"),
+    all_districts: bool = Query(False, description="Compare every district with reports in the window"),
 ):
     """
     Compare statistics across multiple districts.
+    Runs a single aggregation over all requested districts ($in) and picks
+    each district's top disease inside the pipeline ($topN).
     """
-    district_list = [d.strip() for d in districts.split(",")]
+    if not all_districts and not districts:
+        raise HTTPException(status_code=400, detail="Provide districts or set all_districts=true")
+
+    district_list = [] if all_districts else [d.strip() for d in districts.split(",") if d.strip()]
     cutoff = datetime.utcnow() - timedelta(days=days)
-    
-    comparison = []
-    
-    for district in district_list:
-        pipeline = [
-            {
-                "$match": {
-                    "input_water.district": district,
-                    "features.predicted_at": {"$gte": cutoff}
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$features.predicted_disease",
-                    "count": {"$sum": 1}
+
+    match_stage = {"features.predicted_at": {"$gte": cutoff}}
+    if all_districts:
+        match_stage["input_water.district"] = {"$nin": [None, ""]}
+    else:
+        match_stage["input_water.district"] = {"$in": district_list}
+
+    pipeline = [
+        {"$match": match_stage},
+        {
+            "$group": {
+                "_id": {
+                    "district": "$input_water.district",
+                    "disease": "$features.predicted_disease"
+                },
+                "count": {"$sum": 1}
+            }
+        },
+        {
+            "$group": {
+                "_id": "$_id.district",
+                "total_cases": {"$sum": "$count"},
+                "top": {
+                    "$topN": {
+                        "n": 1,
+                        "sortBy": {"count": -1},
+                        "output": "$_id.disease"
+                    }
                 }
             }
+        },
+        {"$sort": {"total_cases": -1}}
+    ]
+
+    results = await prediction_col.aggregate(pipeline).to_list(None)
+
+    by_district = {
+        r["_id"]: {
+            "district": r["_id"],
+            "total_cases": r["total_cases"],
+            "top_disease": r["top"][0] if r.get("top") else None
+        }
+        for r in results
+    }
+
+    if all_districts:
+        comparison = list(by_district.values())
+    else:
+        # Keep the requested order and report districts with no cases as zero
+        comparison = [
+            by_district.get(d, {"district": d, "total_cases": 0, "top_disease": None})
+            for d in district_list
         ]
-        
-        results = await prediction_col.aggregate(pipeline).to_list(None)
-        
-        total = sum(r["count"] for r in results)
-        top_disease = max(results, key=lambda x: x["count"])["_id"] if results else None
-        
-        comparison.append({
-            "district": district,
-            "total_cases": total,
-            "top_disease": top_disease
-        })
-    
+
     return {
         "comparison": comparison,
         "period_days": days
@@ -0,0 +1,330 @@
+# backend/routes/export.py
+"""
+Streaming data export for analysts.
+Iterates a Mongo cursor in batches and writes CSV, NDJSON or Parquet row groups
+straight to the response, so memory stays flat regardless of export size.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, date
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from backend.auth.deps import get_current_user
+from backend.services.mongo_client import prediction_col, water_col, symptom_col
+from backend.services.serialization import serialize_bson
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+# collection name -> (collection, time field, district field, default columns)
+EXPORTABLE = {
+    "predictions": (
+        prediction_col,
+        "features.predicted_at",
+        "input_water.district",
+        [
+            "_id", "features.predicted_at", "features.predicted_disease",
+            "input_water.district", "input_water.location", "input_water.primary_water_source",
+            "input_water.ph", "input_water.turbidity", "input_water.tds", "input_water.chlorine",
+            "input_water.fluoride", "input_water.nitrate", "input_water.coliform",
+            "input_water.temperature", "symptoms", "symptom_id", "water_id",
+        ],
+    ),
+    "water_reports": (
+        water_col,
+        "created_at",
+        "district",
+        [
+            "_id", "created_at", "district", "location", "ph", "turbidity", "tds", "chlorine",
+            "fluoride", "nitrate", "coliform", "temperature", "primary_water_source", "meta.source",
+        ],
+    ),
+    "symptoms_reports": (
+        symptom_col,
+        "created_at",
+        "district",
+        [
+            "_id", "created_at", "location", "symptoms", "severity", "duration",
+            "family_members_affected", "processed_by_model", "meta.source",
+        ],
+    ),
+}
+
+_WATER_PARAMS = ["ph", "turbidity", "tds", "chlorine", "fluoride", "nitrate", "coliform", "temperature"]
+
+# Parquet column types per collection ("float", "bool", "timestamp"); other columns are strings
+COLUMN_TYPES = {
+    "predictions": {
+        "features.predicted_at": "timestamp",
+        **{f"input_water.{p}": "float" for p in _WATER_PARAMS},
+    },
+    "water_reports": {
+        "created_at": "timestamp",
+        **{p: "float" for p in _WATER_PARAMS},
+    },
+    "symptoms_reports": {
+        "created_at": "timestamp",
+        "family_members_affected": "float",
+        "processed_by_model": "bool",
+    },
+}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _get_path(doc: Dict[str, Any], path: str):
+    cur: Any = doc
+    for part in path.split("."):
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(part)
+    return cur
+
+
+def _row(doc: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+    return {c: serialize_bson(_get_path(doc, c)) for c in columns}
+
+
+def _json_default(v):
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    return str(v)
+
+
+def _csv_value(v):
+    if v is None:
+        return ""
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, default=_json_default)
+    return v
+
+
+def _encode_csv(rows: List[Dict[str, Any]], columns: List[str], header: bool) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(columns)
+    for r in rows:
+        writer.writerow([_csv_value(r[c]) for c in columns])
+    return buf.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(r, default=_json_default) + "\n" for r in rows).encode("utf-8")
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever Parquet wrote since the last drain."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        b = bytes(data)
+        self._chunks.append(b)
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks = []
+        return out
+
+
+class _ParquetEncoder:
+    """
+    Writes one row group per batch with a schema fixed up front from
+    COLUMN_TYPES (undeclared columns are strings), so the file never depends
+    on which values happen to arrive first. Report payloads are stored
+    uncoerced, so values are coerced to the declared type: numeric strings
+    become floats, ISO strings timestamps; anything that still doesn't fit is
+    written as null and counted per column (logged when the export finishes).
+    """
+
+    def __init__(self, columns: List[str], column_types: Optional[Dict[str, str]] = None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._pq = pq
+        self.columns = columns
+        self.sink = _ChunkSink()
+        arrow_types = {"float": pa.float64(), "bool": pa.bool_(), "timestamp": pa.timestamp("ms")}
+        column_types = column_types or {}
+        self.schema = pa.schema([
+            pa.field(c, arrow_types.get(column_types.get(c), pa.string())) for c in columns
+        ])
+        self.writer = None
+        self.nulled: Dict[str, int] = {}
+
+    def _to_type(self, value, arrow_type):
+        pa = self._pa
+        if arrow_type == pa.float64():
+            if isinstance(value, (int, float)):
+                return float(value)
+            if isinstance(value, str):
+                return float(value.strip())
+        elif arrow_type == pa.bool_():
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+                return value.strip().lower() == "true"
+            if isinstance(value, (int, float)) and value in (0, 1):
+                return bool(value)
+        elif arrow_type == pa.timestamp("ms"):
+            if isinstance(value, datetime):
+                return value
+            if isinstance(value, str):
+                return datetime.fromisoformat(value)
+        raise ValueError(f"{type(value).__name__} value doesn't fit {arrow_type}")
+
+    def _coerce(self, column: str, value, arrow_type):
+        if value is None:
+            return None
+        if arrow_type == self._pa.string():
+            if isinstance(value, (dict, list)):
+                return json.dumps(value, default=_json_default)
+            return _json_default(value) if not isinstance(value, str) else value
+        try:
+            return self._to_type(value, arrow_type)
+        except (TypeError, ValueError):
+            self.nulled[column] = self.nulled.get(column, 0) + 1
+            return None
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        if self.writer is None:
+            self.writer = self._pq.ParquetWriter(self.sink, self.schema)
+        arrays = {
+            f.name: [self._coerce(f.name, r[f.name], f.type) for r in rows]
+            for f in self.schema
+        }
+        self.writer.write_table(self._pa.table(arrays, schema=self.schema))
+        return self.sink.drain()
+
+    def finish(self) -> bytes:
+        if self.writer is None:
+            # Empty export: still emit a valid file
+            self.writer = self._pq.ParquetWriter(self.sink, self.schema)
+        self.writer.close()
+        if self.nulled:
+            print("Parquet export: values not matching the column type written as null:", self.nulled)
+        return self.sink.drain()
+
+
+async def _stream_export(cursor, fmt: str, columns: List[str], batch_size: int,
+                         column_types: Optional[Dict[str, str]] = None) -> AsyncIterator[bytes]:
+    encoder = _ParquetEncoder(columns, column_types) if fmt == "parquet" else None
+    header_sent = False
+    batch: List[Dict[str, Any]] = []
+
+    def encode(rows):
+        nonlocal header_sent
+        if fmt == "csv":
+            out = _encode_csv(rows, columns, header=not header_sent)
+            header_sent = True
+            return out
+        if fmt == "ndjson":
+            return _encode_ndjson(rows)
+        return encoder.encode(rows)
+
+    async for doc in cursor:
+        batch.append(_row(doc, columns))
+        if len(batch) >= batch_size:
+            yield encode(batch)
+            batch = []
+
+    if batch:
+        yield encode(batch)
+    if fmt == "csv" and not header_sent:
+        yield _encode_csv([], columns, header=True)
+    if encoder is not None:
+        yield encoder.finish()
+
+
+@router.get("/{collection}")
+async def export_collection(
+    collection: str,
+    format: str = Query("csv", description="csv, ndjson or parquet"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD or ISO datetime)"),
+    end_date: Optional[str] = Query(None, description="End date, exclusive (YYYY-MM-DD or ISO datetime)"),
+    district: Optional[str] = Query(None, description="Filter by district"),
+    columns: Optional[str] = Query(None, description="Comma-separated (dotted) field paths to export"),
+    batch_size: int = Query(1000, ge=100, le=10000, description="Rows per cursor batch / row group"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Stream a collection as CSV, NDJSON or Parquet.
+    Only accessible to Government Officials and Admins.
+    """
+    if current_user.get("role") not in ("admin", "government_body"):
+        raise HTTPException(status_code=403, detail="Only Government Officials or Admins can export data")
+
+    if collection not in EXPORTABLE:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown collection. Must be one of: {', '.join(EXPORTABLE)}"
+        )
+
+    fmt = format.lower()
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid format. Must be one of: csv, ndjson, parquet")
+
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export requires pyarrow to be installed")
+
+    col, time_field, district_field, default_columns = EXPORTABLE[collection]
+    export_columns = [c.strip() for c in columns.split(",") if c.strip()] if columns else default_columns
+
+    query: Dict[str, Any] = {}
+    try:
+        time_range = {}
+        if start_date:
+            time_range["$gte"] = datetime.fromisoformat(start_date)
+        if end_date:
+            time_range["$lt"] = datetime.fromisoformat(end_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if time_range:
+        query[time_field] = time_range
+    if district:
+        query[district_field] = district
+
+    projection = {c: 1 for c in export_columns}
+    if "_id" not in projection:
+        projection["_id"] = 0
+
+    cursor = col.find(query, projection).sort(time_field, 1).batch_size(batch_size)
+
+    filename = f"{collection}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    return StreamingResponse(
+        _stream_export(cursor, fmt, export_columns, batch_size, COLUMN_TYPES[collection]),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
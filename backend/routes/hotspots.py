@@ -3,7 +3,7 @@ from fastapi import APIRouter, Query, HTTPException
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 from backend.services.mongo_client import prediction_col
-from backend.app import serialize_bson  # IMPORTANT FIX for serialization
+from backend.services.serialization import serialize_bson  # IMPORTANT FIX for serialization
 from bson import ObjectId
 
 router = APIRouter(prefix="/api", tags=["hotspots"])
@@ -0,0 +1,125 @@
+# backend/routes/model_admin.py
+"""
+Model registry admin routes: list registered versions and promote one to active.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+
+from backend.auth.deps import get_current_user
+from backend.services import predictor
+from backend.services.prediction_cache import prediction_cache
+from backend.services.mongo_client import model_shadow_stats_col
+from backend.services.model_registry import (
+    get_active_pointer,
+    promote_model_version,
+    get_shadow_pointer,
+    set_shadow_model,
+    clear_shadow_model,
+)
+from backend.services.shadow import shadow_evaluator
+
+router = APIRouter(prefix="/api/admin/models", tags=["model_admin"])
+
+
+class ShadowRequest(BaseModel):
+    sample_rate: float = 0.1
+
+
+def _ensure_admin(current_user: dict):
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Only Admins can manage models")
+
+
+@router.get("")
+async def list_models(current_user: dict = Depends(get_current_user)):
+    _ensure_admin(current_user)
+    pointer = await get_active_pointer()
+    bundle = predictor.get_active_bundle()
+    return {
+        "active_version": predictor.get_active_version(),
+        "inference_backend": bundle.backend if bundle else None,
+        "registry_active_version": pointer.get("version") if pointer else None,
+        "versions": predictor.list_model_versions(),
+    }
+
+
+@router.post("/{version}/promote")
+async def promote_model(version: str, current_user: dict = Depends(get_current_user)):
+    """
+    Load, warm up and activate a registered version. Requests keep being served
+    by the current model until the new one is ready; other workers pick the
+    change up on their next registry poll.
+    """
+    _ensure_admin(current_user)
+    try:
+        result = await promote_model_version(version, promoted_by=current_user.get("email"))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Model version {version} failed to load: {e}")
+    return {"status": "ok", **result}
+
+
+@router.get("/prediction-cache")
+async def prediction_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Hit rate of the memoized-prediction cache in this worker."""
+    _ensure_admin(current_user)
+    return {"model_version": predictor.get_active_version(), **prediction_cache.stats()}
+
+
+@router.get("/shadow")
+async def shadow_status(
+    candidate_version: Optional[str] = Query(None, description="Defaults to the current shadow model"),
+    days: int = Query(7, ge=1, le=90),
+    current_user: dict = Depends(get_current_user),
+):
+    """Shadow configuration, this worker's evaluator state and daily agreement stats."""
+    _ensure_admin(current_user)
+    pointer = await get_shadow_pointer() or {}
+    candidate_version = candidate_version or pointer.get("version")
+    stats = []
+    if candidate_version:
+        cursor = model_shadow_stats_col.find({"candidate_version": candidate_version}).sort("day", -1).limit(days)
+        async for doc in cursor:
+            samples = doc.get("samples", 0)
+            stats.append({
+                "day": doc.get("day"),
+                "live_version": doc.get("live_version"),
+                "candidate_version": doc.get("candidate_version"),
+                "samples": samples,
+                "agreement_rate": round(doc.get("agree", 0) / samples, 4) if samples else None,
+                "confusion": doc.get("confusion", {}),
+            })
+    return {
+        "shadow_version": pointer.get("version"),
+        "sample_rate": pointer.get("sample_rate", 0.0),
+        "worker": shadow_evaluator.stats(),
+        "stats": stats,
+    }
+
+
+@router.post("/{version}/shadow")
+async def start_shadow(version: str, payload: ShadowRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Score a sample of live predictions with `version` in the background and
+    record agreement with the live model. Live responses are unaffected.
+    """
+    _ensure_admin(current_user)
+    if not 0 < payload.sample_rate <= 1:
+        raise HTTPException(status_code=400, detail="sample_rate must be in (0, 1]")
+    try:
+        result = await set_shadow_model(version, payload.sample_rate, set_by=current_user.get("email"))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Model version {version} failed to load: {e}")
+    return {"status": "ok", **result}
+
+
+@router.delete("/shadow")
+async def stop_shadow(current_user: dict = Depends(get_current_user)):
+    _ensure_admin(current_user)
+    await clear_shadow_model()
+    return {"status": "ok"}
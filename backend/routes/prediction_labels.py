@@ -0,0 +1,73 @@
+# backend/routes/prediction_labels.py
+"""
+Confirmed diagnoses for prediction reports.
+
+Health workers record the clinically confirmed disease on a prediction; these
+labelled cases feed nirogya-ml/retrain_incremental.py. Labels are normalised
+to the model's class spelling ("Hepatitis A" -> "hepatitis_a") and must be one
+of the active model's classes: an unknown label makes the retrain fall back to
+a full from-scratch run, so adding one has to be asked for explicitly.
+"""
+import re
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
+from backend.auth.deps import get_current_user
+from backend.services.mongo_client import prediction_col
+from backend.services import predictor
+
+router = APIRouter(prefix="/api/predictions", tags=["prediction_labels"])
+
+CONFIRMING_ROLES = ("admin", "government_body", "asha_worker")
+
+
+class ConfirmDiagnosis(BaseModel):
+    disease: str
+    allow_new_label: bool = False  # accept a disease the active model doesn't know
+
+
+def normalize_disease_label(disease: str) -> str:
+    return re.sub(r"[\s\-]+", "_", disease.strip().lower())
+
+
+@router.post("/{prediction_id}/confirm")
+async def confirm_diagnosis(
+    prediction_id: str,
+    payload: ConfirmDiagnosis,
+    current_user: dict = Depends(get_current_user),
+):
+    if current_user.get("role") not in CONFIRMING_ROLES:
+        raise HTTPException(status_code=403, detail="Not allowed to confirm diagnoses")
+    disease = normalize_disease_label(payload.disease)
+    if not disease:
+        raise HTTPException(status_code=400, detail="disease is required")
+    if not payload.allow_new_label:
+        bundle = predictor.get_active_bundle()
+        if bundle is None:
+            raise HTTPException(status_code=503, detail="Model not loaded; cannot validate the disease label")
+        known = [str(c) for c in bundle.label_encoder.classes_]
+        if disease not in known:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown disease '{disease}'. Must be one of: {', '.join(known)} "
+                       f"(set allow_new_label to add a new one)",
+            )
+    try:
+        oid = ObjectId(prediction_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid prediction id")
+
+    result = await prediction_col.update_one(
+        {"_id": oid},
+        {"$set": {
+            "confirmed_disease": disease,
+            "confirmed_at": datetime.utcnow(),
+            "confirmed_by": current_user.get("id"),
+        }},
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    return {"status": "ok", "prediction_id": prediction_id, "confirmed_disease": disease}
@@ -9,7 +9,7 @@ from fastapi import APIRouter, Query, HTTPException
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from backend.services.mongo_client import prediction_col, symptom_col
-from backend.app import serialize_bson
+from backend.services.serialization import serialize_bson
 from bson import ObjectId
 
 router = APIRouter(prefix="/api", tags=["prediction-outbreaks"])
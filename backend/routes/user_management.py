@@ -4,15 +4,20 @@ User Management Routes for Government Officials
 Handles viewing, editing, deactivating, deleting, and resetting passwords for users
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 from bson import ObjectId
 from pydantic import BaseModel, EmailStr, Field
 
-from backend.auth.deps import get_current_user
+from backend.auth.deps import get_current_user, invalidate_cached_user
+from backend.auth.tokens import revoke_user_tokens
+from backend.services.regions import refresh_user_region_keys, touches_region_fields
+from backend.services.counters import get_user_role_status_counts, sum_counts, invalidate_user_counts
+from backend.services.audit_sink import audit_sink
 from backend.services.mongo_client import users_col, audit_logs_col
-from backend.auth.utils import hash_password, generate_temp_password as gen_temp_pwd
+from backend.auth.utils import hash_password_async, generate_temp_password as gen_temp_pwd
+from backend.services.pagination import paginate, set_next_cursor
 import secrets
 import string
 
@@ -90,7 +95,7 @@ async def ensure_government_official(current_user: dict):
 
 async def log_audit(action: str, user_id: str, target_user_id: str, 
                    changes: Optional[Dict[str, Any]] = None, status_code: int = 200) -> None:
-    """Log all user management actions"""
+    """Log all user management actions (buffered; written in batches by the audit sink)"""
     audit_entry = {
         "action": action,
         "performed_by": user_id,
@@ -100,7 +105,7 @@ async def log_audit(action: str, user_id: str, target_user_id: str,
         "status": "success" if status_code == 200 else "failed",
         "status_code": status_code,
     }
-    await audit_logs_col.insert_one(audit_entry)
+    await audit_sink.submit(audit_entry)
 
 
 # ---------------------------
@@ -109,6 +114,7 @@ async def log_audit(action: str, user_id: str, target_user_id: str,
 
 @router.get("/list", response_model=List[UserManagementResponse])
 async def get_all_users(
+    response: Response,
     current_user: dict = Depends(get_current_user),
     role: Optional[str] = Query(None, description="Filter by role"),
     status_filter: Optional[str] = Query(None, description="Filter by status (active/inactive)"),
@@ -118,9 +124,11 @@ async def get_all_users(
     limit: int = Query(50, ge=1, le=500),
     sort_by: str = Query("created_at", description="Sort field"),
     sort_order: int = Query(-1, description="Sort order (1=asc, -1=desc)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
 ):
     """
     Get all users with filtering and pagination.
+    Pass the X-Next-Cursor header value as `cursor` to fetch the next page.
     Only accessible to Government Officials.
     """
     await ensure_government_official(current_user)
@@ -145,9 +153,11 @@ async def get_all_users(
     
     print(f"DEBUG: filter_query={filter_query}, skip={skip}, limit={limit}, sort={sort_by}:{sort_order}")
 
-    # Execute query with sorting, skip, and limit
-    cursor = users_col.find(filter_query).sort(sort_by, sort_order).skip(skip).limit(limit)
-    users = await cursor.to_list(length=limit)
+    # Seek past the cursor on (sort_by, _id); skip only applies without a cursor
+    users, next_cursor = await paginate(
+        users_col, filter_query, sort_by, sort_order, limit=limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
     print(f"DEBUG: Found {len(users)} users")
 
@@ -160,23 +170,20 @@ async def get_users_count(
     role: Optional[str] = Query(None),
     status_filter: Optional[str] = Query(None),
 ):
-    """Get total count of users (for pagination)"""
+    """
+    Get total count of users (for pagination).
+    All figures come from one cached group-by over users.
+    """
     await ensure_government_official(current_user)
     
-    filter_query = {}
-    if role:
-        filter_query["role"] = role
-    if status_filter:
-        filter_query["status"] = status_filter
-    
-    count = await users_col.count_documents(filter_query)
+    counts = await get_user_role_status_counts()
     
     return {
-        "total_count": count,
-        "admin_count": await users_col.count_documents({"role": "admin"}),
-        "government_count": await users_col.count_documents({"role": "government_body"}),
-        "asha_count": await users_col.count_documents({"role": "asha_worker"}),
-        "community_count": await users_col.count_documents({"role": "community_user"}),
+        "total_count": sum_counts(counts, role=role, status=status_filter),
+        "admin_count": sum_counts(counts, role="admin"),
+        "government_count": sum_counts(counts, role="government_body"),
+        "asha_count": sum_counts(counts, role="asha_worker"),
+        "community_count": sum_counts(counts, role="community_user"),
     }
 
 
@@ -203,9 +210,11 @@ async def get_user_detail(
 @router.get("/{user_id}/activity-logs", response_model=List[dict])
 async def get_user_activity_logs(
     user_id: str,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
 ):
     """Get activity logs for a specific user"""
     await ensure_government_official(current_user)
@@ -216,11 +225,11 @@ async def get_user_activity_logs(
         raise HTTPException(status_code=400, detail="Invalid user ID")
     
     # Get logs where target_user_id matches
-    logs_cursor = audit_logs_col.find(
-        {"target_user_id": user_id}
-    ).sort("timestamp", -1).skip(skip).limit(limit)
-    
-    logs = await logs_cursor.to_list(length=limit)
+    logs, next_cursor = await paginate(
+        audit_logs_col, {"target_user_id": user_id}, "timestamp", -1,
+        limit=limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
     return [
         {
@@ -279,6 +288,13 @@ async def update_user(
     if not result:
         raise HTTPException(status_code=404, detail="User not found")
     
+    if touches_region_fields(update_dict):
+        result["region_keys"] = await refresh_user_region_keys(result)
+    
+    invalidate_cached_user(user_id)
+    if "status" in update_dict:
+        invalidate_user_counts()
+    
     # Log the action
     await log_audit(
         action="UPDATE_USER",
@@ -324,6 +340,9 @@ async def toggle_user_status(
     if not result:
         raise HTTPException(status_code=404, detail="User not found")
     
+    invalidate_cached_user(user_id)
+    invalidate_user_counts()
+    
     # Log the action
     await log_audit(
         action="TOGGLE_STATUS",
@@ -356,7 +375,7 @@ async def reset_user_password(
         raise HTTPException(status_code=400, detail="Invalid user ID")
     
     temp_password = gen_temp_pwd(10)
-    hashed = hash_password(temp_password)
+    hashed = await hash_password_async(temp_password)
     
     result = await users_col.find_one_and_update(
         {"_id": obj_id},
@@ -374,6 +393,9 @@ async def reset_user_password(
     if not result:
         raise HTTPException(status_code=404, detail="User not found")
     
+    invalidate_cached_user(user_id)
+    await revoke_user_tokens(user_id)
+    
     # Log the action
     await log_audit(
         action="RESET_PASSWORD",
@@ -433,6 +455,9 @@ async def delete_user(
         return_document=True
     )
     
+    invalidate_cached_user(user_id)
+    invalidate_user_counts()
+    
     # Log the action
     await log_audit(
         action="DELETE_USER",
@@ -454,10 +479,12 @@ async def delete_user(
 
 @router.get("/admin/audit-logs", response_model=List[dict])
 async def get_audit_logs(
+    response: Response,
     current_user: dict = Depends(get_current_user),
     action: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
 ):
     """
     Get all audit logs.
@@ -469,8 +496,10 @@ async def get_audit_logs(
     if action:
         filter_query["action"] = action
     
-    logs_cursor = audit_logs_col.find(filter_query).sort("timestamp", -1).skip(skip).limit(limit)
-    logs = await logs_cursor.to_list(length=limit)
+    logs, next_cursor = await paginate(
+        audit_logs_col, filter_query, "timestamp", -1, limit=limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, next_cursor)
     
     return [
         {
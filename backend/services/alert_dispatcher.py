@@ -0,0 +1,337 @@
+# backend/services/alert_dispatcher.py
+"""
+Persistent, resumable fan-out of water alert emails.
+
+Creating an alert only enqueues: recipients are streamed from the users
+collection into `alert_outbox`, one row per recipient. Worker loops in every
+API process lease batches of due rows, send them through the blocking Resend
+client on a dedicated thread pool (gated by a shared token bucket) and move
+each row through the delivery state machine:
+
+    pending --lease--> leased --ok--> sent
+                          \\--error--> pending (retry with backoff) | failed
+
+Leases expire, so rows held by a crashed process are picked up again by any
+other worker, and alerts whose enqueue was interrupted are resumed at startup.
+Delivery is at-least-once: a crash between sending and recording the result
+can resend that batch.
+"""
+import asyncio
+import os
+import random
+import socket
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from backend.services.cache import TTLCache
+from backend.services.email_service import send_water_alert_batch, ALERT_BATCH_MAX
+from backend.services.mongo_client import alerts_col, alert_outbox_col, users_col
+from backend.services.rate_limit import TokenBucket
+from backend.services.regions import region_recipient_query
+
+# Worker loops per process (each sends one batch at a time)
+ALERT_EMAIL_CONCURRENCY = int(os.getenv("ALERT_EMAIL_CONCURRENCY", "4"))
+ALERT_EMAIL_BATCH_SIZE = min(int(os.getenv("ALERT_EMAIL_BATCH_SIZE", str(ALERT_BATCH_MAX))), ALERT_BATCH_MAX)
+# Provider requests per second (Resend's default account limit is 2/s)
+ALERT_EMAIL_REQUESTS_PER_SECOND = float(os.getenv("ALERT_EMAIL_REQUESTS_PER_SECOND", "2"))
+# Retries after the first send (so up to MAX_RETRIES + 1 attempts per row)
+ALERT_EMAIL_MAX_RETRIES = int(os.getenv("ALERT_EMAIL_MAX_RETRIES", "3"))
+ALERT_EMAIL_RETRY_BASE_SECONDS = float(os.getenv("ALERT_EMAIL_RETRY_BASE_SECONDS", "1"))
+ALERT_OUTBOX_LEASE_SECONDS = float(os.getenv("ALERT_OUTBOX_LEASE_SECONDS", "120"))
+ALERT_OUTBOX_IDLE_SECONDS = float(os.getenv("ALERT_OUTBOX_IDLE_SECONDS", "1"))
+
+# Outbox row states
+PENDING, LEASED, SENT, FAILED = "pending", "leased", "sent", "failed"
+
+_email_executor = ThreadPoolExecutor(max_workers=ALERT_EMAIL_CONCURRENCY, thread_name_prefix="alert-email")
+
+# Shared by all workers in this process so they respect the provider limit together
+_provider_bucket = TokenBucket(
+    rate=ALERT_EMAIL_REQUESTS_PER_SECOND,
+    capacity=max(1.0, ALERT_EMAIL_REQUESTS_PER_SECOND),
+)
+
+# alert_id -> email payload, so workers don't re-read the alert for every batch
+_alert_data_cache = TTLCache(maxsize=256, ttl=600)
+
+_worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def alert_email_data(alert: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "region": alert.get("region"),
+        "title": alert.get("title"),
+        "description": alert.get("description"),
+        "severity": alert.get("severity"),
+        "issued_by": alert.get("created_by_name") or "Health Department",
+    }
+
+
+# ---------------------------------------------------------
+# Enqueue
+# ---------------------------------------------------------
+async def enqueue_alert_recipients(alert_id: str, region: str) -> int:
+    """
+    Stream every recipient in `region` into the outbox. Safe to re-run after a
+    crash: the unique (alert_id, email) index drops rows already enqueued.
+    Returns the number of outbox rows for the alert.
+    """
+    alert_oid = ObjectId(alert_id)
+    now = datetime.utcnow()
+
+    await alerts_col.update_one(
+        {"_id": alert_oid},
+        {"$set": {"status": "enqueuing", "enqueue_started_at": now}}
+    )
+
+    cursor = users_col.find(region_recipient_query(region), projection={"email": 1}).batch_size(1000)
+
+    rows: List[Dict[str, Any]] = []
+    async for user in cursor:
+        email = user.get("email")
+        if not email:
+            continue
+        rows.append({
+            "alert_id": alert_oid,
+            "user_id": user["_id"],
+            "email": email,
+            "state": PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        })
+        if len(rows) >= 1000:
+            await _insert_outbox_rows(rows)
+            rows = []
+    if rows:
+        await _insert_outbox_rows(rows)
+
+    total = await alert_outbox_col.count_documents({"alert_id": alert_oid})
+    await alerts_col.update_one(
+        {"_id": alert_oid},
+        {"$set": {"status": "sending", "recipients_queued": total, "enqueued_at": datetime.utcnow()}}
+    )
+
+    # Workers may already have sent every row while the alert was still
+    # "enqueuing" (their completion check only matches "sending"), and with no
+    # rows at all nothing else would complete it
+    await _complete_alert_if_done(alert_oid)
+    return total
+
+
+async def _insert_outbox_rows(rows: List[Dict[str, Any]]):
+    try:
+        await alert_outbox_col.insert_many(rows, ordered=False)
+    except BulkWriteError as e:
+        # duplicate rows from a resumed enqueue are expected; anything else is not
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+
+
+async def resume_interrupted_enqueues():
+    """Finish enqueuing alerts whose process stopped mid-enqueue."""
+    async for alert in alerts_col.find({"status": "enqueuing"}):
+        try:
+            await enqueue_alert_recipients(str(alert["_id"]), alert.get("region") or "")
+        except Exception as e:
+            print(f"[ALERT ERROR] Resume enqueue failed for {alert['_id']}: {e}")
+
+
+# ---------------------------------------------------------
+# Workers
+# ---------------------------------------------------------
+async def _lease_batch(owner: str) -> List[Dict[str, Any]]:
+    """Claim up to ALERT_EMAIL_BATCH_SIZE due rows (pending, or leased with an expired lease)."""
+    now = datetime.utcnow()
+    due = {
+        "$or": [
+            {"state": PENDING, "next_attempt_at": {"$lte": now}},
+            {"state": LEASED, "lease_expires_at": {"$lt": now}},
+        ]
+    }
+    candidates = await alert_outbox_col.find(due, projection={"_id": 1}) \
+        .sort("next_attempt_at", 1).limit(ALERT_EMAIL_BATCH_SIZE).to_list(length=ALERT_EMAIL_BATCH_SIZE)
+    if not candidates:
+        return []
+
+    token = uuid.uuid4().hex
+    # Re-check `due` so rows claimed concurrently by another worker are skipped
+    await alert_outbox_col.update_many(
+        {"_id": {"$in": [c["_id"] for c in candidates]}, **due},
+        {
+            "$set": {
+                "state": LEASED,
+                "lease_token": token,
+                "lease_owner": owner,
+                "lease_expires_at": now + timedelta(seconds=ALERT_OUTBOX_LEASE_SECONDS),
+            }
+        }
+    )
+    return await alert_outbox_col.find({"lease_token": token}).to_list(length=ALERT_EMAIL_BATCH_SIZE)
+
+
+async def _get_alert_data(alert_oid: ObjectId) -> Optional[Dict[str, Any]]:
+    data = _alert_data_cache.get(alert_oid)
+    if data is None:
+        alert = await alerts_col.find_one({"_id": alert_oid})
+        if not alert:
+            return None
+        data = alert_email_data(alert)
+        _alert_data_cache.set(alert_oid, data)
+    return data
+
+
+async def _send(emails: List[str], alert_data: Dict[str, Any]) -> bool:
+    await _provider_bucket.acquire()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_email_executor, send_water_alert_batch, emails, alert_data)
+    except Exception as e:
+        print(f"[ALERT ERROR] Batch send raised: {e}")
+        return False
+
+
+async def _record_result(alert_oid: ObjectId, rows: List[Dict[str, Any]], ok: bool):
+    """
+    Record a batch outcome. Updates match the lease_token the rows were claimed
+    with, so a worker whose lease expired (and whose rows were re-claimed by
+    another worker) can't overwrite their state or count them twice.
+    """
+    now = datetime.utcnow()
+    clear_lease = {"lease_token": "", "lease_owner": "", "lease_expires_at": ""}
+
+    def owned(ids):
+        return {"_id": {"$in": ids}, "lease_token": rows[0]["lease_token"]}
+
+    if ok:
+        result = await alert_outbox_col.update_many(
+            owned([r["_id"] for r in rows]),
+            {"$set": {"state": SENT, "sent_at": now}, "$unset": clear_lease, "$inc": {"attempts": 1}}
+        )
+        if result.modified_count:
+            await alerts_col.update_one(
+                {"_id": alert_oid},
+                {"$inc": {"emails_sent": result.modified_count}, "$set": {"progress_updated_at": now},
+                 "$min": {"started_at": now}}
+            )
+        return
+
+    # `attempts` counts sends made before this one; the first send isn't a retry
+    retry_rows = [r for r in rows if r.get("attempts", 0) < ALERT_EMAIL_MAX_RETRIES]
+    failed_ids = [r["_id"] for r in rows if r.get("attempts", 0) >= ALERT_EMAIL_MAX_RETRIES]
+
+    if retry_rows:
+        attempt = max(r.get("attempts", 0) for r in retry_rows)
+        delay = ALERT_EMAIL_RETRY_BASE_SECONDS * (2 ** attempt)
+        await alert_outbox_col.update_many(
+            owned([r["_id"] for r in retry_rows]),
+            {
+                "$set": {
+                    "state": PENDING,
+                    "next_attempt_at": now + timedelta(seconds=delay + random.uniform(0, delay / 2)),
+                    "last_error": "send failed",
+                },
+                "$unset": clear_lease,
+                "$inc": {"attempts": 1},
+            }
+        )
+    if failed_ids:
+        result = await alert_outbox_col.update_many(
+            owned(failed_ids),
+            {"$set": {"state": FAILED, "failed_at": now, "last_error": "send failed"}, "$unset": clear_lease, "$inc": {"attempts": 1}}
+        )
+        if result.modified_count:
+            await alerts_col.update_one(
+                {"_id": alert_oid},
+                {"$inc": {"emails_failed": result.modified_count}, "$set": {"progress_updated_at": now},
+                 "$min": {"started_at": now}}
+            )
+
+
+async def _complete_alert_if_done(alert_oid: ObjectId):
+    """Mark the alert finished once no outbox rows remain pending or leased."""
+    outstanding = await alert_outbox_col.find_one(
+        {"alert_id": alert_oid, "state": {"$in": [PENDING, LEASED]}}, projection={"_id": 1}
+    )
+    if outstanding:
+        return
+    alert = await alerts_col.find_one({"_id": alert_oid}, projection={"emails_sent": 1, "emails_failed": 1})
+    if not alert:
+        return
+    status = "failed" if alert.get("emails_failed", 0) and not alert.get("emails_sent", 0) else "sent"
+    # only the first worker to notice completes it (status still "sending")
+    await alerts_col.update_one(
+        {"_id": alert_oid, "status": "sending"},
+        {"$set": {"status": status, "completed_at": datetime.utcnow()}}
+    )
+
+
+async def process_outbox_batch(owner: str) -> int:
+    """Lease, send and record one batch. Returns the number of rows processed."""
+    rows = await _lease_batch(owner)
+    if not rows:
+        return 0
+
+    by_alert: Dict[ObjectId, List[Dict[str, Any]]] = {}
+    for r in rows:
+        by_alert.setdefault(r["alert_id"], []).append(r)
+
+    for alert_oid, alert_rows in by_alert.items():
+        alert_data = await _get_alert_data(alert_oid)
+        if alert_data is None:
+            # alert was deleted: drop its rows
+            await alert_outbox_col.delete_many({"_id": {"$in": [r["_id"] for r in alert_rows]}})
+            continue
+        ok = await _send([r["email"] for r in alert_rows], alert_data)
+        await _record_result(alert_oid, alert_rows, ok)
+        await _complete_alert_if_done(alert_oid)
+
+    return len(rows)
+
+
+async def outbox_worker_loop(worker_index: int = 0):
+    owner = f"{_worker_prefix}:{worker_index}"
+    while True:
+        try:
+            processed = await process_outbox_batch(owner)
+        except Exception as e:
+            print(f"[ALERT ERROR] Outbox worker {owner}: {e}")
+            processed = 0
+        if not processed:
+            await asyncio.sleep(ALERT_OUTBOX_IDLE_SECONDS)
+
+
+# ---------------------------------------------------------
+# Progress
+# ---------------------------------------------------------
+async def get_alert_delivery_progress(alert: Dict[str, Any]) -> Dict[str, Any]:
+    """Outbox state counts, percent complete and throughput for an alert document."""
+    pipeline = [
+        {"$match": {"alert_id": alert["_id"]}},
+        {"$group": {"_id": "$state", "count": {"$sum": 1}}},
+    ]
+    counts = {PENDING: 0, LEASED: 0, SENT: 0, FAILED: 0}
+    async for row in alert_outbox_col.aggregate(pipeline):
+        counts[row["_id"]] = row["count"]
+
+    total = sum(counts.values())
+    finished = counts[SENT] + counts[FAILED]
+
+    throughput = None
+    started_at = alert.get("started_at")
+    if started_at and counts[SENT]:
+        end = alert.get("completed_at") or datetime.utcnow()
+        elapsed = max((end - started_at).total_seconds(), 1.0)
+        throughput = round(counts[SENT] / elapsed * 60, 1)
+
+    return {
+        "total": total,
+        **counts,
+        "percent_complete": round(finished / total * 100, 1) if total else 100.0,
+        "emails_per_minute": throughput,
+    }
@@ -0,0 +1,195 @@
+# backend/services/audit_sink.py
+"""
+Buffered, asynchronous audit-log writer.
+
+Request handlers hand entries to `audit_sink.submit()` and return immediately;
+a background task batches them into `insert_many` calls, flushing when
+AUDIT_FLUSH_SIZE entries are buffered or AUDIT_FLUSH_INTERVAL_SECONDS have
+passed. stop() (wired to app shutdown) flushes everything still queued.
+
+When the in-memory queue is full, AUDIT_OVERFLOW_POLICY decides:
+    "block" - the caller waits for room (no entry is ever dropped)
+    "disk"  - the entry is appended to AUDIT_OVERFLOW_PATH (JSON lines) and
+              replayed into Mongo on the next start() / successful flush
+Failed inserts are spilled to the same file so they are not lost. Spilled
+entries keep (or get) a fixed _id, so replaying a chunk that was partly
+inserted skips the rows already written.
+"""
+import asyncio
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
+
+from backend.services.mongo_client import audit_logs_col
+
+AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+AUDIT_FLUSH_SIZE = int(os.getenv("AUDIT_FLUSH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1"))
+AUDIT_OVERFLOW_POLICY = os.getenv("AUDIT_OVERFLOW_POLICY", "block")  # block | disk
+AUDIT_OVERFLOW_PATH = Path(
+    os.getenv("AUDIT_OVERFLOW_PATH", str(Path(__file__).resolve().parent.parent / "audit_overflow.jsonl"))
+)
+
+_STOP = object()
+
+
+class AuditSink:
+    def __init__(self, collection, max_queue: int = AUDIT_QUEUE_MAX,
+                 flush_size: int = AUDIT_FLUSH_SIZE, flush_interval: float = AUDIT_FLUSH_INTERVAL_SECONDS,
+                 overflow_policy: str = AUDIT_OVERFLOW_POLICY, overflow_path: Path = AUDIT_OVERFLOW_PATH):
+        if overflow_policy not in ("block", "disk"):
+            raise ValueError("overflow_policy must be 'block' or 'disk'")
+        self.collection = collection
+        self.max_queue = max_queue
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.overflow_path = overflow_path
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.spilled = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        await self._replay_overflow()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush every queued entry and stop the writer."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, entry: Dict[str, Any]):
+        if not self.running:
+            # not started (scripts, tests): write through
+            await self.collection.insert_one(entry)
+            return
+        if self.overflow_policy == "disk":
+            try:
+                self._queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                self._spill([entry])
+            return
+        await self._queue.put(entry)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            if stopping:
+                # drain whatever is left behind the sentinel
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is not _STOP:
+                        batch.append(item)
+            await self._write(batch)
+            if stopping:
+                return
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        for i in range(0, len(batch), self.flush_size):
+            chunk = batch[i:i + self.flush_size]
+            try:
+                await self.collection.insert_many(chunk, ordered=False)
+                self.written += len(chunk)
+            except Exception as e:
+                print("Audit flush error:", e)
+                # everything not yet written, not just this chunk
+                self._spill(batch[i:])
+                return
+        if self.overflow_path.exists():
+            await self._replay_overflow()
+
+    def _spill(self, entries: List[Dict[str, Any]]):
+        self._append_overflow(entries)
+        self.spilled += len(entries)
+
+    def _append_overflow(self, entries: List[Dict[str, Any]]):
+        with self.overflow_path.open("a", encoding="utf-8") as f:
+            for entry in entries:
+                # a fixed _id makes replays idempotent: rows a partly failed
+                # insert already wrote come back as duplicate-key errors
+                entry.setdefault("_id", ObjectId())
+                f.write(json_util.dumps(entry) + "\n")
+
+    async def _insert_idempotent(self, chunk: List[Dict[str, Any]]) -> int:
+        """insert_many that treats already-present _ids as written. Returns rows inserted."""
+        try:
+            result = await self.collection.insert_many(chunk, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+            return e.details.get("nInserted", 0)
+
+    async def _replay_overflow(self):
+        replay_path = self.overflow_path.with_suffix(".replaying")
+        # a .replaying file left by a crash mid-replay goes first
+        if replay_path.exists() and not await self._replay_file(replay_path):
+            return
+        if not self.overflow_path.exists():
+            return
+        self.overflow_path.replace(replay_path)
+        await self._replay_file(replay_path)
+
+    async def _replay_file(self, replay_path: Path) -> bool:
+        entries = [
+            json_util.loads(line)
+            for line in replay_path.read_text(encoding="utf-8").splitlines()
+            if line.strip()
+        ]
+        ok = True
+        for i in range(0, len(entries), self.flush_size):
+            chunk = entries[i:i + self.flush_size]
+            try:
+                self.written += await self._insert_idempotent(chunk)
+            except Exception as e:
+                print("Audit overflow replay error:", e)
+                # put back only what wasn't inserted, for the next attempt
+                self._append_overflow(entries[i:])
+                ok = False
+                break
+        replay_path.unlink()
+        return ok
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "spilled": self.spilled,
+            "overflow_policy": self.overflow_policy,
+        }
+
+
+audit_sink = AuditSink(audit_logs_col)
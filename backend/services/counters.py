@@ -0,0 +1,75 @@
+# backend/services/counters.py
+"""
+Cheap counters for the admin landing pages.
+
+- User counts come from one $group pass over `users` (by role and status);
+  every total, per-role and per-status figure is derived from that result.
+- Large report collections use estimated_document_count (collection metadata,
+  no scan).
+Both are memoized for a few seconds so dashboard refreshes share one query.
+"""
+import asyncio
+import os
+from typing import Any, Dict, Optional
+
+from backend.services.cache import TTLCache, get_or_compute
+from backend.services.mongo_client import (
+    users_col,
+    audit_logs_col,
+    symptom_col,
+    water_col,
+    prediction_col,
+)
+
+COUNTERS_TTL_SECONDS = float(os.getenv("COUNTERS_TTL_SECONDS", "30"))
+
+_counters_cache = TTLCache(maxsize=16, ttl=COUNTERS_TTL_SECONDS)
+
+
+async def _group_users_by_role_status() -> Dict[tuple, int]:
+    pipeline = [
+        {"$group": {"_id": {"role": "$role", "status": "$status"}, "count": {"$sum": 1}}}
+    ]
+    counts: Dict[tuple, int] = {}
+    async for row in users_col.aggregate(pipeline):
+        key = (row["_id"].get("role"), row["_id"].get("status"))
+        counts[key] = row["count"]
+    return counts
+
+
+async def get_user_role_status_counts() -> Dict[tuple, int]:
+    """{(role, status): count} for all users; status is None when unset."""
+    return await get_or_compute(_counters_cache, "users", _group_users_by_role_status)
+
+
+def sum_counts(counts: Dict[tuple, int], role: Optional[str] = None, status: Optional[str] = None) -> int:
+    """Total of the grouped counts matching the given role and/or status."""
+    return sum(
+        n for (r, s), n in counts.items()
+        if (role is None or r == role) and (status is None or s == status)
+    )
+
+
+async def _estimate_collections() -> Dict[str, int]:
+    audit, symptoms, water, predictions = await asyncio.gather(
+        audit_logs_col.estimated_document_count(),
+        symptom_col.estimated_document_count(),
+        water_col.estimated_document_count(),
+        prediction_col.estimated_document_count(),
+    )
+    return {
+        "audit_logs": audit,
+        "symptom_reports": symptoms,
+        "water_reports": water,
+        "prediction_reports": predictions,
+    }
+
+
+async def get_collection_estimates() -> Dict[str, Any]:
+    """Approximate document counts of the large report collections."""
+    return await get_or_compute(_counters_cache, "collections", _estimate_collections)
+
+
+def invalidate_user_counts():
+    """Call after changes that move users between roles or statuses."""
+    _counters_cache.pop("users")
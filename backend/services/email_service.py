@@ -72,11 +72,8 @@ def send_otp_email(to_email: str, otp: str) -> bool:
         return False
 
 
-def send_water_alert_email(to_email: str, alert_data: dict) -> bool:
-    """
-    Send water contamination alert to users in affected region.
-    Returns True if sent successfully, False otherwise.
-    """
+def _water_alert_content(alert_data: dict) -> tuple:
+    """Build the (subject, html) for a water alert; shared by single and batch sends."""
     region = alert_data.get('region', 'Your Area')
     title = alert_data.get('title', 'Water Contamination Detected')
     description = alert_data.get('description', 'Water contamination has been detected in your area.')
@@ -132,16 +129,31 @@ def send_water_alert_email(to_email: str, alert_data: dict) -> bool:
         </div>
     </div>
     """
+    return subject, html_content
+
+
+ALERT_FROM = "Nirogya Alerts <onboarding@resend.dev>"
+
+# Resend accepts at most 100 emails per batch request
+ALERT_BATCH_MAX = 100
+
+
+def send_water_alert_email(to_email: str, alert_data: dict) -> bool:
+    """
+    Send water contamination alert to users in affected region.
+    Returns True if sent successfully, False otherwise.
+    """
+    subject, html_content = _water_alert_content(alert_data)
     
     if DEV_MODE:
         print(f"[DEV EMAIL - ALERT] To: {to_email}")
-        print(f"[DEV EMAIL - ALERT] Region: {region}, Title: {title}")
+        print(f"[DEV EMAIL - ALERT] Region: {alert_data.get('region')}, Title: {alert_data.get('title')}")
         print("[DEV EMAIL - ALERT] Email would be sent in production mode")
         return True
     
     try:
         params: resend.Emails.SendParams = {
-            "from": "Nirogya Alerts <onboarding@resend.dev>",
+            "from": ALERT_FROM,
             "to": [to_email],
             "subject": subject,
             "html": html_content
@@ -154,6 +166,42 @@ def send_water_alert_email(to_email: str, alert_data: dict) -> bool:
         return False
 
 
+def send_water_alert_batch(to_emails: list, alert_data: dict) -> bool:
+    """
+    Send the same water alert to up to ALERT_BATCH_MAX recipients in one
+    provider request (one email per recipient, so addresses aren't shared).
+    Returns True if the batch was accepted, False otherwise.
+    """
+    if not to_emails:
+        return True
+    if len(to_emails) > ALERT_BATCH_MAX:
+        raise ValueError(f"Batch too large: {len(to_emails)} > {ALERT_BATCH_MAX}")
+
+    subject, html_content = _water_alert_content(alert_data)
+
+    if DEV_MODE:
+        print(f"[DEV EMAIL - ALERT BATCH] {len(to_emails)} recipients, Title: {alert_data.get('title')}")
+        print("[DEV EMAIL - ALERT BATCH] Emails would be sent in production mode")
+        return True
+
+    try:
+        params = [
+            {
+                "from": ALERT_FROM,
+                "to": [to_email],
+                "subject": subject,
+                "html": html_content
+            }
+            for to_email in to_emails
+        ]
+        response = resend.Batch.send(params)
+        print(f"[EMAIL] Alert batch of {len(to_emails)} sent, response: {response}")
+        return True
+    except Exception as e:
+        print(f"[EMAIL ERROR] Failed to send alert batch: {e}")
+        return False
+
+
 def send_test_email(to_email: str) -> bool:
     """
     Send a test email to verify the email service is working.
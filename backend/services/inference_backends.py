@@ -0,0 +1,151 @@
+# backend/services/inference_backends.py
+"""
+Alternative inference backend: CatBoost's standalone evaluator.
+
+CatBoost can't export models with categorical features to ONNX, so the
+portable format is its own dependency-free Python export
+(save_model(format="python")): the trees, borders and CTR tables as plain
+data plus an applicator. Serving it needs neither the CatBoost runtime nor the
+pickled model. Categorical values are hashed with a memoized CityHash, so each
+district / location / source string is only hashed once per process.
+
+Selected with INFERENCE_BACKEND=compiled (see predictor.load_bundle). Each
+export ships a parity.json of CatBoost reference outputs and the SHA-256 of
+the .joblib it was exported from; the compiled model is only used if that
+source is unchanged and it reproduces the outputs at load time.
+
+    python -m backend.services.inference_backends export <version>
+"""
+import functools
+import hashlib
+import importlib.util
+import json
+import math
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+COMPILED_FILENAME = "model_compiled.py"
+PARITY_FILENAME = "parity.json"
+CAT_HASH_CACHE_SIZE = 65536
+PARITY_TOLERANCE = 1e-6
+
+
+def source_fingerprint(model_path: Path) -> str:
+    """SHA-256 of the pickled model an export was made from."""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_compiled(model, out_dir: Path, feature_cols: List[str], categorical_cols: List[str],
+                    parity_rows: List[list], source: Optional[str] = None) -> Path:
+    """
+    Write the standalone evaluator plus CatBoost's own outputs for parity_rows
+    (rows in feature_cols order). `source` is the source_fingerprint() of the
+    model file. Needs the CatBoost runtime; serving doesn't.
+    """
+    import pandas as pd
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    compiled_path = out_dir / COMPILED_FILENAME
+    model.save_model(str(compiled_path), format="python")
+
+    df = pd.DataFrame(parity_rows, columns=feature_cols)
+    raw = model.predict(df, prediction_type="RawFormulaVal")
+    classes = [int(c) for c in model.classes_]
+    parity = {
+        "source_sha256": source,
+        "feature_cols": feature_cols,
+        "categorical_cols": categorical_cols,
+        "class_labels": classes,
+        "rows": parity_rows,
+        "raw": [[float(v) for v in (r if hasattr(r, "__len__") else [r])] for r in raw],
+        "expected": [int(c) for c in model.predict(df).reshape(-1)],
+    }
+    (out_dir / PARITY_FILENAME).write_text(json.dumps(parity), encoding="utf-8")
+    return compiled_path
+
+
+class CompiledModel:
+    """Evaluates a CatBoost standalone Python export for rows in feature_cols order."""
+
+    def __init__(self, compiled_path: Path, parity: dict):
+        spec = importlib.util.spec_from_file_location(f"_catboost_compiled_{id(self)}", compiled_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        # Memoize categorical hashing (pure-Python CityHash dominates per-call cost)
+        if hasattr(module, "hash_uint64"):
+            module.hash_uint64 = functools.lru_cache(maxsize=CAT_HASH_CACHE_SIZE)(module.hash_uint64)
+
+        self._apply = getattr(module, "apply_catboost_model_multi", None) or module.apply_catboost_model
+        self.class_labels = parity["class_labels"]
+        feature_cols = parity["feature_cols"]
+        cats = set(parity["categorical_cols"])
+        self._cat_idx = [i for i, c in enumerate(feature_cols) if c in cats]
+        self._float_idx = [i for i, c in enumerate(feature_cols) if c not in cats]
+
+    def raw(self, row: list) -> List[float]:
+        floats = [float(row[i]) for i in self._float_idx]
+        cats = [str(row[i]) for i in self._cat_idx]
+        out = self._apply(floats, cats)
+        return list(out) if isinstance(out, (list, tuple)) else [out]
+
+    def predict_index(self, row: list) -> int:
+        values = self.raw(row)
+        if len(values) == 1:
+            # binary model: one logit
+            return self.class_labels[1 if values[0] > 0 else 0]
+        best = max(range(len(values)), key=values.__getitem__)
+        return self.class_labels[best]
+
+    def predict(self, rows: List[list]) -> List[int]:
+        return [self.predict_index(r) for r in rows]
+
+
+def parity_check(compiled: CompiledModel, parity: dict) -> Tuple[bool, int]:
+    """Compare against CatBoost's outputs recorded at export. Returns (ok, mismatches)."""
+    mismatches = 0
+    for row, raw, expected in zip(parity["rows"], parity["raw"], parity["expected"]):
+        got = compiled.raw(row)
+        if (compiled.predict_index(row) != expected or len(got) != len(raw)
+                or any(not math.isclose(a, b, rel_tol=PARITY_TOLERANCE, abs_tol=PARITY_TOLERANCE)
+                       for a, b in zip(got, raw))):
+            mismatches += 1
+    return mismatches == 0, mismatches
+
+
+def load_compiled(out_dir: Path, source: Optional[str] = None) -> Optional[CompiledModel]:
+    """
+    Load and parity-check an export; None if missing, exported from a model
+    file other than `source` (a source_fingerprint()), or not faithful to CatBoost.
+    """
+    compiled_path = out_dir / COMPILED_FILENAME
+    parity_path = out_dir / PARITY_FILENAME
+    if not compiled_path.exists() or not parity_path.exists():
+        return None
+    parity = json.loads(parity_path.read_text(encoding="utf-8"))
+    if source is not None and parity.get("source_sha256") != source:
+        print(f"Compiled model in {out_dir} is stale (exported from a different model file)")
+        return None
+    compiled = CompiledModel(compiled_path, parity)
+    ok, mismatches = parity_check(compiled, parity)
+    if not ok:
+        print(f"Compiled model in {out_dir} failed parity ({mismatches}/{len(parity['rows'])} rows differ)")
+        return None
+    return compiled
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "export":
+        print("usage: python -m backend.services.inference_backends export <version>")
+        sys.exit(2)
+    from backend.services import predictor
+
+    version = sys.argv[2]
+    bundle = predictor.load_bundle(version, backend="catboost")
+    path = predictor.export_compiled_bundle(bundle)
+    print(f"Exported {version} to {path}")
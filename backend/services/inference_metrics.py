@@ -0,0 +1,139 @@
+# backend/services/inference_metrics.py
+"""
+Per-stage inference timing.
+
+predict_disease() and the merger pipeline time each stage (feature building,
+DataFrame/row construction, model.predict, label decoding, Mongo writes...)
+into latency histograms labelled by stage, model version and caller
+("/predict", "merger", "poller"). Served by GET /metrics/inference.
+
+Sampling is decided once per prediction: with INFERENCE_TIMING_SAMPLE_RATE=0
+start_timer() returns None and each stage costs a single `if timer:` check;
+sampled calls pay two perf_counter_ns() reads and a bisect per stage.
+"""
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+INFERENCE_TIMING_SAMPLE_RATE = float(os.getenv("INFERENCE_TIMING_SAMPLE_RATE", "1.0"))
+
+# Upper bounds in microseconds
+BUCKETS_US = (
+    5, 10, 25, 50, 100, 250, 500,
+    1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000,
+)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum_us")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_US) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum_us = 0.0
+
+    def observe(self, us: float):
+        self.counts[bisect_left(BUCKETS_US, us)] += 1
+        self.count += 1
+        self.sum_us += us
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_US + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class InferenceMetrics:
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self._lock = threading.Lock()  # predictions run in executor threads
+
+    def observe(self, stage: str, model_version: Optional[str], caller: str, elapsed_ns: int):
+        key = (stage, model_version or "unknown", caller)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(elapsed_ns / 1000)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            items = sorted(self._histograms.items())
+            return [
+                {
+                    "stage": stage,
+                    "model_version": version,
+                    "caller": caller,
+                    "count": h.count,
+                    "mean_us": round(h.sum_us / h.count, 3) if h.count else None,
+                    "p50_us": h.quantile(0.5),
+                    "p95_us": h.quantile(0.95),
+                    "p99_us": h.quantile(0.99),
+                    "buckets_us": dict(zip([str(b) for b in BUCKETS_US] + ["+Inf"], h.counts)),
+                }
+                for (stage, version, caller), h in items
+            ]
+
+    def prometheus_text(self) -> str:
+        """Prometheus exposition format (cumulative buckets, seconds)."""
+        name = "nirogya_inference_stage_seconds"
+        lines = [f"# HELP {name} Time spent per inference stage", f"# TYPE {name} histogram"]
+        with self._lock:
+            for (stage, version, caller), h in sorted(self._histograms.items()):
+                labels = f'stage="{stage}",model_version="{version}",caller="{caller}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS_US, h.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{{labels},le="{bound / 1e6:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+                lines.append(f"{name}_sum{{{labels}}} {h.sum_us / 1e6:.9f}")
+                lines.append(f"{name}_count{{{labels}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+inference_metrics = InferenceMetrics()
+
+
+class StageTimer:
+    """Times consecutive stages: each mark() records the time since the previous one."""
+
+    __slots__ = ("caller", "model_version", "start", "last")
+
+    def __init__(self, caller: str, model_version: Optional[str] = None):
+        self.caller = caller
+        self.model_version = model_version
+        self.start = self.last = time.perf_counter_ns()
+
+    def mark(self, stage: str):
+        now = time.perf_counter_ns()
+        inference_metrics.observe(stage, self.model_version, self.caller, now - self.last)
+        self.last = now
+
+    def skip(self):
+        """Exclude the time since the last mark (e.g. a nested, separately timed call)."""
+        self.last = time.perf_counter_ns()
+
+    def finish(self, stage: str = "total"):
+        inference_metrics.observe(stage, self.model_version, self.caller, time.perf_counter_ns() - self.start)
+
+
+def start_timer(caller: str, model_version: Optional[str] = None) -> Optional[StageTimer]:
+    """A StageTimer for this call if it's sampled, else None."""
+    rate = INFERENCE_TIMING_SAMPLE_RATE
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return None
+    return StageTimer(caller, model_version)
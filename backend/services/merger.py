@@ -11,10 +11,12 @@ from backend.services.mongo_client import (
     water_col,
     prediction_col,
     record_asha_submission,
+    mark_district_summary_stale,
     users_col,
 )
 
-from backend.services.predictor import predict_disease
+from backend.services.predictor import predict_disease, get_active_version
+from backend.services.inference_metrics import start_timer
 
 
 # ---------------------------------------------------------
@@ -173,7 +175,7 @@ def _extract_center(sym_doc: Dict[str, Any], water_doc: Dict[str, Any]) -> Optio
 # ---------------------------------------------------------
 # MERGE & ML PREDICT & STORE (Main Pipeline)
 # ---------------------------------------------------------
-async def merge_and_predict_and_store(sym_doc: Dict[str, Any], water_doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+async def merge_and_predict_and_store(sym_doc: Dict[str, Any], water_doc: Dict[str, Any], caller: str = "merger") -> Optional[Dict[str, Any]]:
     """
     - Merges symptom + water report
     - Runs ML model
@@ -191,8 +193,10 @@ async def merge_and_predict_and_store(sym_doc: Dict[str, Any], water_doc: Dict[s
         }
     - Marks symptom as processed
     - Records ASHA submission if reporter identified
+    Stage timings are labelled with `caller` ("merger" or "poller").
     """
 
+    timer = start_timer(caller, get_active_version())
     try:
         # -------------------------
         # 1. Build clean merged input
@@ -215,18 +219,24 @@ async def merge_and_predict_and_store(sym_doc: Dict[str, Any], water_doc: Dict[s
         }
 
         symptoms_list = sym_doc.get("symptoms", [])
+        if timer:
+            timer.mark("merge_input")
 
         # -------------------------
         # 2. RUN ML PREDICTOR
         # -------------------------
-        prediction_result = predict_disease(water_input, {"symptoms": symptoms_list})
+        prediction_result = predict_disease(water_input, {"symptoms": symptoms_list}, caller)
+        if timer:
+            timer.mark("predict")
 
         predicted_label = None
         feature_vector = None
+        model_version = None
 
         if isinstance(prediction_result, dict):
             predicted_label = prediction_result.get("predicted_disease")
             feature_vector = prediction_result.get("features_used")
+            model_version = prediction_result.get("model_version")
 
         # -------------------------
         # 3. Extract coordinates (optional)
@@ -246,6 +256,7 @@ async def merge_and_predict_and_store(sym_doc: Dict[str, Any], water_doc: Dict[s
                 "feature_vector": feature_vector,
                 "center": center,
             },
+            "model_version": model_version,
             "symptom_id": str(sym_doc.get("_id")),
             "water_id": str(water_doc.get("_id")) if water_doc and water_doc.get("_id") else None,
         }
@@ -254,6 +265,9 @@ async def merge_and_predict_and_store(sym_doc: Dict[str, Any], water_doc: Dict[s
         # 5. Store in MongoDB
         # -------------------------
         await prediction_col.insert_one(pred_doc)
+        await mark_district_summary_stale(district)
+        if timer:
+            timer.mark("store_prediction")
 
         # -------------------------
         # 6. Mark symptom as processed
@@ -281,6 +295,9 @@ async def merge_and_predict_and_store(sym_doc: Dict[str, Any], water_doc: Dict[s
                 await record_asha_submission(reporter_w_oid, "water", water_id)
         except Exception as e:
             print("Failed to record ASHA submission for water:", e)
+        if timer:
+            timer.mark("post_process")
+            timer.finish("pipeline_total")
 
         # -------------------------
         # 8. RETURN prediction
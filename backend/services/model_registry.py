@@ -0,0 +1,206 @@
+# backend/services/model_registry.py
+"""
+Active-model coordination for the versioned model registry.
+
+Artifacts live on disk under predictor.REGISTRY_DIR/<version>/. The version
+every worker should serve is stored in Mongo (model_state, _id "active") so a
+promotion made through one worker reaches all of them: each worker polls the
+pointer and, when it changes, loads + warms the new version in a thread and
+swaps it in atomically. In-flight predictions finish on the bundle they started
+with; nothing is dropped during the swap.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from backend.services.mongo_client import model_state_col, model_shadow_stats_col
+from backend.services import predictor
+from backend.services.shadow import shadow_evaluator
+from backend.services.startup_timing import startup_timer
+
+MODEL_WATCH_INTERVAL_SECONDS = float(os.getenv("MODEL_WATCH_INTERVAL_SECONDS", "30"))
+SHADOW_FLUSH_SECONDS = float(os.getenv("SHADOW_FLUSH_SECONDS", "30"))
+
+_ACTIVE_ID = "active"
+_SHADOW_ID = "shadow"
+_swap_lock = asyncio.Lock()
+
+
+async def get_active_pointer() -> Optional[Dict[str, Any]]:
+    return await model_state_col.find_one({"_id": _ACTIVE_ID})
+
+
+async def _load_in_background(version: str):
+    """Load + warm up a version in a worker thread, then swap it in."""
+    async with _swap_lock:
+        if predictor.get_active_version() == version:
+            return predictor.get_active_bundle()
+        loop = asyncio.get_running_loop()
+        bundle = await loop.run_in_executor(None, predictor.load_and_activate, version)
+        print(f"Model version {version} activated")
+        return bundle
+
+
+async def promote_model_version(version: str, promoted_by: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Make `version` the active model for every worker.
+    The version is loaded and warmed up here first, so a broken artifact
+    raises before the shared pointer moves.
+    """
+    known = {v["version"] for v in predictor.list_model_versions()}
+    if version not in known:
+        raise ValueError(f"Unknown model version: {version}")
+
+    previous = predictor.get_active_version()
+    await _load_in_background(version)
+
+    now = datetime.utcnow()
+    await model_state_col.update_one(
+        {"_id": _ACTIVE_ID},
+        {
+            "$set": {"version": version, "promoted_at": now, "promoted_by": promoted_by},
+            "$push": {"history": {
+                "$each": [{"version": version, "previous": previous, "promoted_at": now, "promoted_by": promoted_by}],
+                "$slice": -50,
+            }},
+        },
+        upsert=True,
+    )
+    # local default for the next cold start
+    predictor.write_active_pointer(version)
+    return {"version": version, "previous": previous, "promoted_at": now.isoformat()}
+
+
+async def sync_active_model():
+    """Load the shared active version if this worker is serving a different one."""
+    try:
+        pointer = await get_active_pointer()
+        version = pointer.get("version") if pointer else None
+        if version and version != predictor.get_active_version():
+            await _load_in_background(version)
+    except Exception as e:
+        print("Model sync error:", e)
+
+
+async def model_watch_loop():
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL_SECONDS)
+        await sync_active_model()
+        await sync_shadow_model()
+
+
+# ---------------------------------------------------------
+# Shadow evaluation (see services/shadow.py)
+# ---------------------------------------------------------
+async def get_shadow_pointer() -> Optional[Dict[str, Any]]:
+    return await model_state_col.find_one({"_id": _SHADOW_ID})
+
+
+async def _apply_shadow(version: Optional[str], sample_rate: float):
+    if not version:
+        shadow_evaluator.clear_candidate()
+        return
+    if version == shadow_evaluator.candidate_version:
+        shadow_evaluator.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        return
+    # loads in the shadow worker process; this thread just waits
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, shadow_evaluator.set_candidate, version, sample_rate)
+    print(f"Shadow model {version} loaded (sample_rate={sample_rate})")
+
+
+async def set_shadow_model(version: str, sample_rate: float, set_by: Optional[str] = None) -> Dict[str, Any]:
+    """Start shadow-scoring live traffic with `version` in every worker."""
+    known = {v["version"] for v in predictor.list_model_versions()}
+    if version not in known:
+        raise ValueError(f"Unknown model version: {version}")
+    await _apply_shadow(version, sample_rate)
+    now = datetime.utcnow()
+    await model_state_col.update_one(
+        {"_id": _SHADOW_ID},
+        {"$set": {"version": version, "sample_rate": sample_rate, "set_at": now, "set_by": set_by}},
+        upsert=True,
+    )
+    return {"version": version, "sample_rate": sample_rate, "set_at": now.isoformat()}
+
+
+async def clear_shadow_model():
+    shadow_evaluator.clear_candidate()
+    await model_state_col.update_one(
+        {"_id": _SHADOW_ID},
+        {"$set": {"version": None, "sample_rate": 0.0, "set_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+async def sync_shadow_model():
+    """Follow the shared shadow pointer (set through another worker)."""
+    try:
+        pointer = await get_shadow_pointer() or {}
+        await _apply_shadow(pointer.get("version"), pointer.get("sample_rate", 0.0))
+    except Exception as e:
+        print("Shadow sync error:", e)
+
+
+def _stat_key(label) -> str:
+    # labels become field names inside the confusion sub-document
+    return str(label).replace(".", "_").replace("$", "_") or "_"
+
+
+async def flush_shadow_stats():
+    """Add the evaluator's accumulated counts into model_shadow_stats."""
+    drained = shadow_evaluator.drain()
+    if not drained:
+        return
+    now = datetime.utcnow()
+    day = now.strftime("%Y-%m-%d")
+    for (live_version, candidate_version), entry in drained.items():
+        inc = {"samples": entry["samples"], "agree": entry["agree"]}
+        for (live_label, cand_label), n in entry["confusion"].items():
+            key = f"confusion.{_stat_key(live_label)}.{_stat_key(cand_label)}"
+            inc[key] = inc.get(key, 0) + n
+        await model_shadow_stats_col.update_one(
+            {"_id": f"{live_version}|{candidate_version}|{day}"},
+            {
+                "$inc": inc,
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"live_version": live_version, "candidate_version": candidate_version, "day": day},
+            },
+            upsert=True,
+        )
+
+
+async def shadow_flush_loop():
+    try:
+        while True:
+            await asyncio.sleep(SHADOW_FLUSH_SECONDS)
+            try:
+                await flush_shadow_stats()
+            except Exception as e:
+                print("Shadow stats flush error:", e)
+    finally:
+        # counts gathered since the last flush are written on shutdown
+        await flush_shadow_stats()
+
+
+async def start_model_service():
+    """
+    Lifespan-managed model service: load the start-up version in a worker
+    thread (the API serves non-ML routes meanwhile; /predict answers 503
+    until the model is ready), catch up with the shared pointer, then
+    follow promotions until cancelled at shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        async with _swap_lock:
+            await loop.run_in_executor(None, predictor.load_startup_model)
+        startup_timer.record_stage("model_load", time.perf_counter() - start)
+    finally:
+        startup_timer.component_ready("model_service")
+    await sync_active_model()
+    await sync_shadow_model()
+    print(f"ML_READY = {predictor.is_model_ready()} (model_version={predictor.get_active_version()})")
+    await model_watch_loop()
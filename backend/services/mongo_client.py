@@ -27,6 +27,9 @@ users_col = db["users"]
 otp_col = db["email_otps"]
 alerts_col = db["water_alerts"]
 
+# One row per alert recipient, worked through by the alert delivery workers
+alert_outbox_col = db["alert_outbox"]
+
 # ASHA workers collection with reporting stats
 asha_workers_col = db["asha_workers"]
 asha_col = asha_workers_col  # Alias for compatibility
@@ -37,11 +40,85 @@ admin_workers_col = db["admin_workers"]
 # Audit logs collection (for user management actions)
 audit_logs_col = db["audit_logs"]
 
+# Revoked JWTs (logout) and per-user token cut-offs (password reset)
+revoked_tokens_col = db["revoked_tokens"]
+
+# Materialized per-district stats (served by /api/districts/stats)
+district_summary_col = db["district_summaries"]
+
+# Daily water-quality statistic buckets per district / location
+water_stats_col = db["water_quality_stats"]
+
+# Shared model-registry state (active model version, promotion history)
+model_state_col = db["model_state"]
+
+# Live vs candidate model agreement, per (live version, candidate version, day)
+model_shadow_stats_col = db["model_shadow_stats"]
+
 
 def get_db():
     return db
 
 
+async def ensure_indexes():
+    """
+    Create the indexes the API relies on. Called once on application startup.
+    """
+    await water_stats_col.create_index([("scope", 1), ("key", 1), ("day", 1)], unique=True)
+
+    # Alert targeting: precomputed region membership
+    await users_col.create_index("region_keys")
+
+    # Alert delivery outbox
+    await alert_outbox_col.create_index([("alert_id", 1), ("email", 1)], unique=True)
+    await alert_outbox_col.create_index([("alert_id", 1), ("state", 1)])
+    await alert_outbox_col.create_index([("state", 1), ("next_attempt_at", 1)])
+    await alert_outbox_col.create_index([("state", 1), ("lease_expires_at", 1)])
+    await alert_outbox_col.create_index("lease_token", sparse=True)
+
+    # OTPs: expired codes are deleted by the TTL monitor
+    await otp_col.create_index("expires_at", expireAfterSeconds=0)
+    await otp_col.create_index([("email", 1), ("used", 1), ("expires_at", 1)])
+    # at most one live code per email, across workers (also enforces the request
+    # rate limit). Duplicates from before this index expire within OTP_EXPIRES_MINUTES.
+    try:
+        await otp_col.create_index("email", unique=True, partialFilterExpression={"used": False})
+    except Exception as e:
+        print("OTP live-code index not created yet:", e)
+
+    await revoked_tokens_col.create_index("expires_at", expireAfterSeconds=0)
+    await revoked_tokens_col.create_index("created_at")
+
+    # Keyset pagination: (sort key, _id) indexes backing the seek queries
+    await prediction_col.create_index([("features.predicted_at", -1), ("_id", -1)])
+    # Labelled cases streamed by the retraining job, in confirmation order
+    await prediction_col.create_index(
+        [("confirmed_at", 1), ("_id", 1)],
+        partialFilterExpression={"confirmed_at": {"$exists": True}},
+    )
+    await model_shadow_stats_col.create_index([("candidate_version", 1), ("day", -1)])
+    await water_col.create_index([("created_at", -1), ("_id", -1)])
+    await users_col.create_index([("created_at", -1), ("_id", -1)])
+    await audit_logs_col.create_index([("timestamp", -1), ("_id", -1)])
+    await audit_logs_col.create_index([("action", 1), ("timestamp", -1), ("_id", -1)])
+    await audit_logs_col.create_index([("target_user_id", 1), ("timestamp", -1), ("_id", -1)])
+
+
+async def mark_district_summary_stale(district: str):
+    """
+    Called whenever new water or prediction data arrives for a district.
+    The next /api/districts/stats request recomputes and re-materializes it.
+    stale_generation lets a recompute that started before this mark avoid
+    clearing it.
+    """
+    if not district:
+        return
+    await district_summary_col.update_many(
+        {"district": district},
+        {"$set": {"stale": True}, "$inc": {"stale_generation": 1}}
+    )
+
+
 # ============================================================
 # ASHA WORKER SUPPORT FUNCTIONS
 # ============================================================
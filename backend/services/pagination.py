@@ -0,0 +1,120 @@
+# backend/services/pagination.py
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token encoding the (sort key, _id) of the last
+document on a page. The next page is fetched with a seek query
+(sort key past the cursor, _id as tie-breaker) instead of skip, so every page
+costs the same regardless of depth when a matching (sort key, _id) index exists.
+
+List endpoints keep returning plain arrays; the token for the following page is
+sent in the X-Next-Cursor response header (absent on the last page).
+"""
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _get_path(doc: Dict[str, Any], path: str):
+    """Read a dotted field path (e.g. features.predicted_at) from a document."""
+    cur: Any = doc
+    for part in path.split("."):
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(part)
+    return cur
+
+
+def encode_cursor(doc: Dict[str, Any], sort_field: str) -> str:
+    payload = {"id": doc["_id"]}
+    if sort_field != "_id":
+        payload["v"] = _get_path(doc, sort_field)
+    raw = json_util.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if "id" not in payload:
+            raise ValueError("missing id")
+        return payload
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def seek_filter(sort_field: str, direction: int, cursor: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Filter selecting documents strictly after the cursor in (sort_field, _id) order.
+    Missing/null sort values sort first ascending and last descending, as in MongoDB.
+    """
+    id_op = "$gt" if direction > 0 else "$lt"
+    last_id = cursor["id"]
+
+    if sort_field == "_id":
+        return {"_id": {id_op: last_id}}
+
+    value = cursor.get("v")
+
+    if value is None:
+        same_value = {sort_field: None, "_id": {id_op: last_id}}
+        if direction > 0:
+            return {"$or": [{sort_field: {"$ne": None}}, same_value]}
+        return same_value
+
+    branches = [
+        {sort_field: {id_op: value}},
+        {sort_field: value, "_id": {id_op: last_id}},
+    ]
+    if direction < 0:
+        branches.append({sort_field: None})
+    return {"$or": branches}
+
+
+async def paginate(
+    collection,
+    query: Dict[str, Any],
+    sort_field: str,
+    direction: int = -1,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page sorted by (sort_field, _id) in `direction`.
+    Returns (docs, next_cursor). `skip` is only honoured without a cursor,
+    for clients that still page by offset.
+    """
+    direction = 1 if direction > 0 else -1
+
+    if cursor:
+        seek = seek_filter(sort_field, direction, decode_cursor(cursor))
+        query = {"$and": [query, seek]} if query else seek
+
+    sort = [(sort_field, direction)]
+    if sort_field != "_id":
+        sort.append(("_id", direction))
+
+    find = collection.find(query, projection).sort(sort)
+    if skip and not cursor:
+        find = find.skip(skip)
+
+    docs = await find.limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort_field)
+
+    return docs, next_cursor
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
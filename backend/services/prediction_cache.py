@@ -0,0 +1,79 @@
+# backend/services/prediction_cache.py
+"""
+Memoized predictions.
+
+Reports from the same village and water sample usually produce identical
+feature vectors, so predict_disease() looks the vector up here before running
+the model. Water readings are quantized to their measurement precision first
+(the model sees the same quantized values), the vector is hashed canonically,
+and the key is tagged with the model version so a model swap never serves a
+stale answer. The cache is also cleared on every swap to release memory.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from backend.services.cache import TTLCache
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))  # 0 disables
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "3600"))
+
+# Decimal places each water reading is reported with
+WATER_PRECISION = {
+    "ph": 2,
+    "turbidity": 1,    # NTU
+    "tds": 0,          # mg/L
+    "chlorine": 2,     # mg/L
+    "fluoride": 2,     # mg/L
+    "nitrate": 1,      # mg/L
+    "coliform": 0,     # CFU/100 mL
+    "temperature": 1,  # deg C
+}
+
+
+def quantize_features(feat_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Round water readings to measurement precision (in place) and return the dict."""
+    for field, digits in WATER_PRECISION.items():
+        value = feat_dict.get(field)
+        if isinstance(value, float):
+            feat_dict[field] = round(value, digits) + 0.0  # + 0.0 folds -0.0 into 0.0
+    return feat_dict
+
+
+def feature_key(model_version: str, feat_dict: Dict[str, Any]) -> Tuple[str, str]:
+    canonical = json.dumps(feat_dict, sort_keys=True, separators=(",", ":"), default=str)
+    return model_version, hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class PredictionCache:
+    """Thread-safe wrapper around TTLCache (predictions run in executor threads)."""
+
+    def __init__(self, maxsize: int = PREDICTION_CACHE_SIZE, ttl: float = PREDICTION_CACHE_TTL_SECONDS):
+        self.enabled = maxsize > 0
+        self._cache = TTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key: Tuple[str, str], value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._cache.set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled, **self._cache.stats()}
+
+
+prediction_cache = PredictionCache()
@@ -1,35 +1,295 @@
 # backend/services/predictor.py
 import os
+import json
+import random
 from pathlib import Path
-import joblib
-import pandas as pd
+from typing import Any, Dict, List, Optional
 import traceback
 
+from backend.services.prediction_cache import prediction_cache, quantize_features, feature_key
+from backend.services.inference_metrics import start_timer
+from backend.services.inference_backends import export_compiled, load_compiled, source_fingerprint
+from backend.services.shadow import shadow_evaluator
+
+# joblib / pandas (and CatBoost, pulled in by unpickling the model) are imported
+# lazily: importing this module is cheap and the model is loaded by the
+# application's lifespan (see model_registry.start_model_service).
+
 BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
 
+# Legacy single-model location (used when the registry has no active version)
 MODEL_PATH = BASE_DIR / "models" / "disease_prediction_model.joblib"
 ENCODER_PATH = BASE_DIR / "models" / "label_encoder.joblib"
 
-# Load model and metadata (this is synchronous)
-try:
-    _model = joblib.load(MODEL_PATH)
-    _meta = joblib.load(ENCODER_PATH)
-    _feature_cols = _meta["feature_cols"]
-    _categorical_cols = _meta["categorical_cols"]
-    _label_encoder = _meta["label_encoder"]
-    print("Predictor: Model Loaded Successfully!!")
-except Exception as e:
-    print("\n\n---------------- MODEL LOAD ERROR ----------------")
-    print("MODEL_PATH =", MODEL_PATH)
-    print("ENCODER_PATH =", ENCODER_PATH)
-    print("ERROR:", e)
-    traceback.print_exc()
-    print("-------------------------------------------------\n\n")
-    _model = None
-    _meta = None
-    _feature_cols = None
-    _categorical_cols = None
-    _label_encoder = None
+# Versioned model registry:
+#   models/registry/<version>/disease_prediction_model.joblib
+#   models/registry/<version>/label_encoder.joblib   (label_encoder + feature/categorical cols)
+#   models/registry/<version>/metadata.json          (optional: trained_at, metrics, notes...)
+#   models/registry/ACTIVE                           (version loaded at start-up)
+REGISTRY_DIR = Path(os.getenv("MODEL_REGISTRY_DIR", str(BASE_DIR / "models" / "registry")))
+ACTIVE_FILE = REGISTRY_DIR / "ACTIVE"
+MODEL_FILENAME = "disease_prediction_model.joblib"
+ENCODER_FILENAME = "label_encoder.joblib"
+METADATA_FILENAME = "metadata.json"
+LEGACY_VERSION = "legacy"
+
+WARMUP_BATCH_SIZE = int(os.getenv("MODEL_WARMUP_BATCH_SIZE", "32"))
+
+# Single-row predictions skip pandas and feed CatBoost an ordered feature list
+PREDICT_FAST_PATH = os.getenv("PREDICT_FAST_PATH", "1") != "0"
+
+# "catboost" (the pickled model on the CatBoost runtime) or "compiled"
+# (CatBoost's standalone export, see inference_backends)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "catboost")
+COMPILED_DIR = BASE_DIR / "models" / "compiled"  # exports of the legacy model
+PARITY_ROWS = 64
+
+
+class ModelBundle:
+    """A loaded model version: model + label encoder + feature metadata."""
+
+    def __init__(self, version: str, model, meta: dict, metadata: Optional[dict] = None):
+        self.version = version
+        self.model = model
+        self.meta = meta
+        self.feature_cols = meta["feature_cols"]
+        self.categorical_cols = meta["categorical_cols"]
+        self.label_encoder = meta["label_encoder"]
+        self.metadata = metadata or {}
+        # class index -> label lookup (replaces label_encoder.inverse_transform per call)
+        self.labels = _label_array(self.label_encoder)
+        # CatBoost models take a plain feature list for one object; others go through pandas.
+        # warm_up() re-checks this against the DataFrame path.
+        self.fast_path = PREDICT_FAST_PATH and hasattr(model, "get_cat_feature_indices") and self.labels is not None
+        # set when served by the compiled backend (model is then None)
+        self.compiled = None
+
+    @property
+    def backend(self) -> str:
+        return "compiled" if self.compiled is not None else "catboost"
+
+
+def _label_array(label_encoder):
+    import numpy as np
+
+    classes = getattr(label_encoder, "classes_", None)
+    return np.asarray(classes) if classes is not None else None
+
+
+def feature_row(feat_dict: dict, feature_cols: List[str]) -> list:
+    """Feature values in training column order."""
+    return [feat_dict.get(c) for c in feature_cols]
+
+
+# The active bundle. Swapped by reference, so a prediction that already
+# picked up the old bundle finishes on it while new calls use the new one.
+_active: Optional[ModelBundle] = None
+
+
+def artifact_paths(version: str):
+    if version == LEGACY_VERSION:
+        return MODEL_PATH, ENCODER_PATH
+    version_dir = REGISTRY_DIR / version
+    return version_dir / MODEL_FILENAME, version_dir / ENCODER_FILENAME
+
+
+def read_version_metadata(version: str) -> dict:
+    if version == LEGACY_VERSION:
+        return {}
+    path = REGISTRY_DIR / version / METADATA_FILENAME
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def list_model_versions() -> List[Dict[str, Any]]:
+    """All versions in the registry (plus the legacy model if present)."""
+    versions = []
+    if REGISTRY_DIR.is_dir():
+        for d in sorted(REGISTRY_DIR.iterdir()):
+            if d.is_dir() and (d / MODEL_FILENAME).exists() and (d / ENCODER_FILENAME).exists():
+                versions.append({"version": d.name, "metadata": read_version_metadata(d.name)})
+    if MODEL_PATH.exists() and ENCODER_PATH.exists():
+        versions.append({"version": LEGACY_VERSION, "metadata": {}})
+    return versions
+
+
+def read_active_pointer() -> str:
+    """Version to load at start-up: MODEL_VERSION env, else registry ACTIVE file, else legacy."""
+    env_version = os.getenv("MODEL_VERSION")
+    if env_version:
+        return env_version
+    try:
+        version = ACTIVE_FILE.read_text(encoding="utf-8").strip()
+        if version:
+            return version
+    except FileNotFoundError:
+        pass
+    return LEGACY_VERSION
+
+
+def write_active_pointer(version: str):
+    REGISTRY_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = ACTIVE_FILE.with_suffix(".tmp")
+    tmp.write_text(version, encoding="utf-8")
+    tmp.replace(ACTIVE_FILE)
+
+
+def compiled_dir(version: str) -> Path:
+    return COMPILED_DIR if version == LEGACY_VERSION else REGISTRY_DIR / version
+
+
+def export_compiled_bundle(bundle: ModelBundle) -> Path:
+    """Export a CatBoost bundle to the compiled format next to its artifacts."""
+    rows = [feature_row(build_features(w, s), bundle.feature_cols) for w, s in _synthetic_docs(PARITY_ROWS)]
+    return export_compiled(
+        bundle.model, compiled_dir(bundle.version), bundle.feature_cols, bundle.categorical_cols, rows,
+        source=source_fingerprint(artifact_paths(bundle.version)[0]),
+    )
+
+
+def _load_compiled_bundle(version: str, meta: dict) -> Optional[ModelBundle]:
+    """
+    The compiled backend for a version, (re-)exporting it first if it is
+    missing or was exported from a different .joblib than the one on disk.
+    None (caller falls back to CatBoost) if it can't be built or fails parity.
+    """
+    source = source_fingerprint(artifact_paths(version)[0])
+    compiled = load_compiled(compiled_dir(version), source)
+    if compiled is None:
+        import joblib
+
+        try:
+            catboost_bundle = ModelBundle(version, joblib.load(artifact_paths(version)[0]), meta)
+            export_compiled_bundle(catboost_bundle)
+            del catboost_bundle
+        except Exception as e:
+            print(f"Model {version}: compiled export failed ({e})")
+            return None
+        compiled = load_compiled(compiled_dir(version), source)
+    if compiled is None:
+        return None
+    bundle = ModelBundle(version, None, meta, read_version_metadata(version))
+    bundle.compiled = compiled
+    return bundle
+
+
+def load_bundle(version: str, backend: Optional[str] = None) -> ModelBundle:
+    """Load a model version from disk (synchronous; run in an executor from async code)."""
+    import joblib
+
+    backend = backend or INFERENCE_BACKEND
+    model_path, encoder_path = artifact_paths(version)
+    meta = joblib.load(encoder_path)
+    if backend == "compiled":
+        bundle = _load_compiled_bundle(version, meta)
+        if bundle is not None:
+            return bundle
+        print(f"Model {version}: compiled backend unavailable, using CatBoost")
+    model = joblib.load(model_path)
+    return ModelBundle(version, model, meta, read_version_metadata(version))
+
+
+def _synthetic_docs(n: int):
+    rng = random.Random(42)
+    symptoms = ["diarrhea", "vomiting", "fever", "abdominal pain", "dehydration", "headache"]
+    for _ in range(n):
+        w_doc = {
+            "district": "", "location": "", "primary_water_source": "",
+            "ph": rng.uniform(6.0, 9.0), "turbidity": rng.uniform(0, 20), "tds": rng.uniform(50, 900),
+            "chlorine": rng.uniform(0, 2), "fluoride": rng.uniform(0, 2), "nitrate": rng.uniform(0, 60),
+            "coliform": rng.uniform(0, 100), "temperature": rng.uniform(15, 35),
+        }
+        s_doc = {"symptoms": rng.sample(symptoms, rng.randint(0, 3))}
+        yield w_doc, s_doc
+
+
+def warm_up(bundle: ModelBundle, batch_size: int = WARMUP_BATCH_SIZE):
+    """
+    Run the model on a synthetic batch and a single row so lazy initialisation
+    happens before the bundle serves real traffic. Raises if the model can't predict.
+    """
+    rows = [build_features(w, s) for w, s in _synthetic_docs(batch_size)]
+    if bundle.compiled is not None:
+        # parity was checked at load; this fills the categorical hash cache
+        bundle.compiled.predict([feature_row(r, bundle.feature_cols) for r in rows])
+        return
+
+    import pandas as pd
+
+    expected = [
+        int(i) for i in bundle.model.predict(pd.DataFrame(rows, columns=bundle.feature_cols)).ravel()
+    ]
+    pred_idx = int(bundle.model.predict(pd.DataFrame(rows[:1], columns=bundle.feature_cols))[0])
+    bundle.label_encoder.inverse_transform([pred_idx])
+
+    # The fast path must agree with the DataFrame path on the warm-up batch
+    if bundle.fast_path:
+        try:
+            fast = [_predict_index_fast(bundle, feature_row(r, bundle.feature_cols)) for r in rows]
+        except Exception as e:
+            print(f"Model {bundle.version}: fast path disabled ({e})")
+            fast = None
+        if fast != expected:
+            bundle.fast_path = False
+            if fast is not None:
+                print(f"Model {bundle.version}: fast path disabled (predictions differ from DataFrame path)")
+
+
+def activate_bundle(bundle: ModelBundle):
+    global _active
+    _active = bundle
+    # keys carry the model version; clearing just frees the old version's entries
+    prediction_cache.clear()
+
+
+def get_active_bundle() -> Optional[ModelBundle]:
+    return _active
+
+
+def get_active_version() -> Optional[str]:
+    return _active.version if _active else None
+
+
+def is_model_ready() -> bool:
+    return _active is not None
+
+
+def load_and_activate(version: str, warm: bool = True, backend: Optional[str] = None) -> ModelBundle:
+    """Load, optionally warm up, then atomically swap in a version."""
+    bundle = load_bundle(version, backend)
+    if warm:
+        warm_up(bundle)
+    activate_bundle(bundle)
+    return bundle
+
+
+def load_startup_model(warm: bool = True) -> Optional[ModelBundle]:
+    """
+    Load the start-up version (synchronous; the lifespan runs it in a thread).
+    Falls back to the legacy model if the configured version can't be loaded.
+    """
+    version = read_active_pointer()
+    try:
+        bundle = load_and_activate(version, warm=warm)
+        print(f"Predictor: Model Loaded Successfully!! (version={version})")
+        return bundle
+    except Exception as e:
+        print("\n\n---------------- MODEL LOAD ERROR ----------------")
+        print("MODEL_VERSION =", version)
+        print("MODEL_PATH =", artifact_paths(version)[0])
+        print("ERROR:", e)
+        traceback.print_exc()
+        print("-------------------------------------------------\n\n")
+    if version != LEGACY_VERSION and MODEL_PATH.exists():
+        try:
+            bundle = load_and_activate(LEGACY_VERSION, warm=warm)
+            print("Predictor: fell back to the legacy model")
+            return bundle
+        except Exception as e:
+            print("Legacy model load error:", e)
+    return None
 
 
 def _safe_float(v):
@@ -110,30 +370,100 @@ def build_features(w_doc: dict, s_doc: dict):
 
     return features
 
-def predict_disease(w_doc: dict, s_doc: dict):
+def _predict_index_fast(bundle: ModelBundle, row: list) -> int:
+    # CatBoost treats a flat list as a single object and returns its class
+    return int(bundle.model.predict(row).ravel()[0])
+
+
+def _build_dataframe(bundle: ModelBundle, feat_dict: dict):
+    import pandas as pd
+
+    # Create DataFrame in correct order (using feature_cols from metadata)
+    return pd.DataFrame([feat_dict], columns=bundle.feature_cols)
+
+
+def _predict_index_frame(bundle: ModelBundle, df) -> int:
+    # Predict (CatBoost returns [[class_index]])
+    return int(bundle.model.predict(df)[0])
+
+
+def _predict_index_dataframe(bundle: ModelBundle, feat_dict: dict) -> int:
+    return _predict_index_frame(bundle, _build_dataframe(bundle, feat_dict))
+
+
+def predict_disease(w_doc: dict, s_doc: dict, caller: str = "direct"):
     """
     Synchronous predict function returning label and features dict.
     Call it inside run_in_executor from async code.
     Uses CatBoost model with label encoder for disease prediction.
+    `caller` labels the per-stage timings ("/predict", "merger", "poller").
     """
-    if _model is None:
+    # Take one reference to the active bundle so a concurrent swap can't mix versions
+    bundle = _active
+    if bundle is None:
         raise RuntimeError("Model not loaded")
+    timer = start_timer(caller, bundle.version)
 
-    # Build features
-    feat_dict = build_features(w_doc or {}, s_doc or {})
-
-    # Create DataFrame in correct order (using feature_cols from metadata)
-    df = pd.DataFrame([feat_dict], columns=_feature_cols)
+    # Build features (water readings at measurement precision)
+    feat_dict = quantize_features(build_features(w_doc or {}, s_doc or {}))
+    if timer:
+        timer.mark("build_features")
 
-    # Predict (CatBoost returns [[class_index]])
-    pred_idx = int(_model.predict(df)[0])
+    # Identical inputs skip inference
+    cache_key = feature_key(bundle.version, feat_dict)
+    pred_label = prediction_cache.get(cache_key)
+    if timer:
+        timer.mark("cache_lookup")
+    if pred_label is not None:
+        if timer:
+            timer.finish()
+        shadow_evaluator.offer(feat_dict, pred_label, bundle.version)
+        return {
+            "predicted_disease": pred_label,
+            "features_used": feat_dict,
+            "model_version": bundle.version
+        }
 
-    # Convert back to label using label encoder
-    if _label_encoder is None:
-        raise RuntimeError("Label encoder not loaded")
-    pred_label = _label_encoder.inverse_transform([pred_idx])[0]
+    if bundle.compiled is not None:
+        row = feature_row(feat_dict, bundle.feature_cols)
+        if timer:
+            timer.mark("row_build")
+        pred_idx = bundle.compiled.predict_index(row)
+        if timer:
+            timer.mark("model_predict")
+        if bundle.labels is not None:
+            pred_label = bundle.labels[pred_idx].item()
+        else:
+            pred_label = bundle.label_encoder.inverse_transform([pred_idx])[0]
+    elif bundle.fast_path:
+        row = feature_row(feat_dict, bundle.feature_cols)
+        if timer:
+            timer.mark("row_build")
+        pred_idx = _predict_index_fast(bundle, row)
+        if timer:
+            timer.mark("model_predict")
+        pred_label = bundle.labels[pred_idx].item()
+    else:
+        df = _build_dataframe(bundle, feat_dict)
+        if timer:
+            timer.mark("dataframe_build")
+        pred_idx = _predict_index_frame(bundle, df)
+        if timer:
+            timer.mark("model_predict")
+        # Convert back to label using label encoder
+        if bundle.label_encoder is None:
+            raise RuntimeError("Label encoder not loaded")
+        pred_label = bundle.label_encoder.inverse_transform([pred_idx])[0]
+    if timer:
+        timer.mark("label_decode")
 
+    prediction_cache.set(cache_key, pred_label)
+    if timer:
+        timer.finish()
+    # candidate model (if any) scores this off the request path
+    shadow_evaluator.offer(feat_dict, pred_label, bundle.version)
     return {
         "predicted_disease": pred_label,
-        "features_used": feat_dict
+        "features_used": feat_dict,
+        "model_version": bundle.version
     }
@@ -0,0 +1,43 @@
+# backend/services/rate_limit.py
+"""
+In-process token-bucket rate limiting.
+
+TokenBucket limits a single stream (e.g. outgoing email API calls). Limits
+are per worker process; limits that must hold across workers (OTP requests
+and attempts) are kept in Mongo instead.
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Holds up to `capacity` tokens, refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` would be available."""
+        self._refill()
+        missing = tokens - self.tokens
+        return max(0.0, missing / self.rate) if self.rate > 0 else float("inf")
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait (without blocking the event loop) until `tokens` are available."""
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.wait_time(tokens))
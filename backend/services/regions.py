@@ -0,0 +1,85 @@
+# backend/services/regions.py
+"""
+Precomputed region membership for alert targeting.
+
+Each user carries `region_keys`: the normalized names of every place their
+profile mentions (state / district / block / village, taken from the explicit
+fields and from the comma-separated parts of location/address). The array is
+indexed, so an alert for a region resolves its recipients with one indexed
+query instead of regex-scanning every user.
+"""
+import re
+from typing import Any, Dict, List
+
+from backend.services.mongo_client import users_col
+
+# Profile fields that hold a single place name
+REGION_FIELDS = ("state", "district", "block", "village", "region")
+# Free-text fields that may list several places ("Village A, Kamrup Metro, Assam")
+REGION_TEXT_FIELDS = ("location", "address")
+
+
+def normalize_region(name: str) -> str:
+    """Lower-case, strip punctuation and collapse whitespace: ' Kamrup-Metro ' -> 'kamrup metro'."""
+    name = re.sub(r"[^\w\s]", " ", str(name).lower())
+    return re.sub(r"\s+", " ", name).strip()
+
+
+def region_keys_from_text(text: str) -> List[str]:
+    """Normalized keys for every comma/semicolon/slash separated part of text."""
+    if not text:
+        return []
+    keys = []
+    for part in re.split(r"[,;/|]", str(text)):
+        key = normalize_region(part)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def region_keys_for_user(doc: Dict[str, Any]) -> List[str]:
+    keys: List[str] = []
+    for field in REGION_FIELDS + REGION_TEXT_FIELDS:
+        for key in region_keys_from_text(doc.get(field)):
+            if key not in keys:
+                keys.append(key)
+    return keys
+
+
+def region_recipient_query(region: str) -> Dict[str, Any]:
+    """
+    Users belonging to `region`. A multi-part region such as
+    "Village A, Kamrup Metro" selects users matching every part.
+    """
+    keys = region_keys_from_text(region)
+    if not keys:
+        # matches nothing
+        return {"region_keys": {"$in": []}}
+    if len(keys) == 1:
+        return {"region_keys": {"$in": keys}}
+    return {"region_keys": {"$all": keys}}
+
+
+def touches_region_fields(update: Dict[str, Any]) -> bool:
+    return any(f in update for f in REGION_FIELDS + REGION_TEXT_FIELDS)
+
+
+async def refresh_user_region_keys(user_doc: Dict[str, Any]):
+    """Recompute and store region_keys for a user document (after create/update)."""
+    keys = region_keys_for_user(user_doc)
+    if keys != user_doc.get("region_keys"):
+        await users_col.update_one({"_id": user_doc["_id"]}, {"$set": {"region_keys": keys}})
+    return keys
+
+
+async def backfill_region_keys() -> int:
+    """Populate region_keys for users created before it existed."""
+    updated = 0
+    projection = {f: 1 for f in REGION_FIELDS + REGION_TEXT_FIELDS}
+    async for user in users_col.find({"region_keys": {"$exists": False}}, projection):
+        await users_col.update_one(
+            {"_id": user["_id"]},
+            {"$set": {"region_keys": region_keys_for_user(user)}}
+        )
+        updated += 1
+    return updated
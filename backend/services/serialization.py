@@ -0,0 +1,45 @@
+# backend/services/serialization.py
+import numbers
+from datetime import datetime, date
+
+from bson import ObjectId
+
+
+# --------------------------
+# BSON / numpy serializer
+# --------------------------
+def serialize_bson(obj):
+    """
+    Recursively convert Mongo/BSON types into JSON-serializable types:
+    - ObjectId -> str
+    - datetime -> preserved as datetime for Mongo sorting
+    - date -> isoformat string
+    - numpy scalars -> native python types
+    - dict/list -> recursively processed
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+
+    # IMPORTANT: Keep datetime as datetime for Mongo & sorting
+    if isinstance(obj, datetime):
+        return obj
+    if isinstance(obj, date):
+        return obj.isoformat()
+
+    # numpy scalars (checked by module so numpy isn't imported just for this)
+    if type(obj).__module__ == "numpy" and getattr(obj, "ndim", None) == 0:
+        return obj.item()
+
+    if isinstance(obj, (str, bool, type(None), numbers.Number)):
+        return obj
+
+    if isinstance(obj, dict):
+        return {str(k): serialize_bson(v) for k, v in obj.items()}
+
+    if isinstance(obj, (list, tuple)):
+        return [serialize_bson(v) for v in obj]
+
+    try:
+        return str(obj)
+    except Exception:
+        return None
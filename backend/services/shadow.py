@@ -0,0 +1,200 @@
+# backend/services/shadow.py
+"""
+Shadow evaluation of a candidate model on live traffic.
+
+predict_disease() offers a sample of its (features, live label) pairs to the
+shadow evaluator after it has its answer. offer() is a sampling check plus a
+non-blocking put on a bounded queue: when the queue is full the sample is
+dropped, so live predictions never wait on the candidate.
+
+The candidate is loaded and scored in a separate worker process (niced by
+SHADOW_WORKER_NICE), not in the API process: scoring holds the GIL - the
+compiled backend is pure Python and the CatBoost path builds DataFrames - and
+would otherwise compete with the executor threads serving live predictions.
+In the API process a collector thread only moves batches to that process and
+waits for the labels, keeping agreement counts and a live x candidate
+confusion matrix in memory; model_registry.shadow_flush_loop() periodically
+$inc's them into the model_shadow_stats collection.
+"""
+import multiprocessing
+import os
+import queue
+import random
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+SHADOW_QUEUE_MAX = int(os.getenv("SHADOW_QUEUE_MAX", "5000"))
+SHADOW_BATCH_SIZE = int(os.getenv("SHADOW_BATCH_SIZE", "256"))
+SHADOW_BATCH_WAIT_SECONDS = float(os.getenv("SHADOW_BATCH_WAIT_SECONDS", "0.5"))
+SHADOW_WORKER_NICE = int(os.getenv("SHADOW_WORKER_NICE", "10"))
+
+
+class ShadowEvaluator:
+    def __init__(self, max_queue: int = SHADOW_QUEUE_MAX, batch_size: int = SHADOW_BATCH_SIZE,
+                 batch_wait: float = SHADOW_BATCH_WAIT_SECONDS):
+        self.candidate_version: Optional[str] = None
+        self.sample_rate = 0.0
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue: "queue.Queue[Tuple[dict, Any, str]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._drop_lock = threading.Lock()  # offer() runs on many executor threads
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.dropped = 0
+        self.scored = 0
+        self.errors = 0
+
+    # ---------- configuration ----------
+    def set_candidate(self, version: str, sample_rate: float):
+        """
+        Load `version` in the worker process (blocking; run in an executor
+        from async code) and start sampling. Raises if it can't be loaded.
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker,
+            )
+        try:
+            self._pool.submit(_load_in_worker, version).result()
+        except BrokenProcessPool:
+            self._pool = None
+            raise
+        self.candidate_version = version
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+            self._thread.start()
+
+    def clear_candidate(self):
+        self.candidate_version = None
+        self.sample_rate = 0.0
+
+    def shutdown(self):
+        self.clear_candidate()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ---------- hot path ----------
+    def offer(self, feat_dict: dict, live_label, live_version: str):
+        """Called by predict_disease with its answer. Never blocks."""
+        rate = self.sample_rate
+        if rate <= 0 or self.candidate_version is None or (rate < 1 and random.random() >= rate):
+            return
+        try:
+            self._queue.put_nowait((dict(feat_dict), live_label, live_version))
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+    # ---------- collector ----------
+    def _next_batch(self) -> List[Tuple[dict, Any, str]]:
+        batch = [self._queue.get()]
+        try:
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get(timeout=self.batch_wait))
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            version, pool = self.candidate_version, self._pool
+            if version is None or pool is None:
+                continue
+            try:
+                # waits without holding the GIL while the worker process scores
+                labels = pool.submit(_score_in_worker, version, [feat for feat, _, _ in batch]).result()
+            except BrokenProcessPool as e:
+                # worker died (e.g. OOM): stop sampling; the next shadow sync
+                # (model_registry.sync_shadow_model) starts a new one
+                print("Shadow worker process died:", e)
+                self.errors += 1
+                self._pool = None
+                self.clear_candidate()
+                continue
+            except Exception as e:
+                self.errors += 1
+                print("Shadow scoring error:", e)
+                continue
+            self._record(version, batch, labels)
+
+    def _record(self, candidate_version: str, batch, candidate_labels):
+        with self._lock:
+            for (_, live_label, live_version), cand_label in zip(batch, candidate_labels):
+                entry = self._pending.get((live_version, candidate_version))
+                if entry is None:
+                    entry = self._pending[(live_version, candidate_version)] = {
+                        "samples": 0, "agree": 0, "confusion": defaultdict(int),
+                    }
+                entry["samples"] += 1
+                entry["agree"] += int(str(live_label) == str(cand_label))
+                entry["confusion"][(str(live_label), str(cand_label))] += 1
+                self.scored += 1
+
+    def drain(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Counts accumulated since the last drain, keyed by (live_version, candidate_version)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "candidate_version": self.candidate_version,
+            "sample_rate": self.sample_rate,
+            "queued": self._queue.qsize(),
+            "scored": self.scored,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+# ---------- worker process ----------
+_worker_bundle = None
+
+
+def _init_worker():
+    if SHADOW_WORKER_NICE and hasattr(os, "nice"):
+        os.nice(SHADOW_WORKER_NICE)
+
+
+def _worker_bundle_for(version: str):
+    global _worker_bundle
+    if _worker_bundle is None or _worker_bundle.version != version:
+        from backend.services import predictor
+
+        bundle = predictor.load_bundle(version)
+        predictor.warm_up(bundle)
+        _worker_bundle = bundle
+    return _worker_bundle
+
+
+def _load_in_worker(version: str) -> str:
+    return _worker_bundle_for(version).version
+
+
+def _score_in_worker(version: str, feats: List[dict]) -> List[Any]:
+    return _score(_worker_bundle_for(version), feats)
+
+
+def _score(bundle, feats: List[dict]) -> List[Any]:
+    """Batch-score feature dicts with a bundle (compiled or CatBoost)."""
+    rows = [[f.get(c) for c in bundle.feature_cols] for f in feats]
+    if bundle.compiled is not None:
+        idx = bundle.compiled.predict(rows)
+    else:
+        import pandas as pd
+
+        idx = [int(i) for i in bundle.model.predict(pd.DataFrame(rows, columns=bundle.feature_cols)).reshape(-1)]
+    if bundle.labels is not None:
+        return [bundle.labels[i].item() for i in idx]
+    return list(bundle.label_encoder.inverse_transform(idx))
+
+
+shadow_evaluator = ShadowEvaluator()
@@ -0,0 +1,157 @@
+# backend/services/startup_timing.py
+"""
+Start-up timing report.
+
+install_import_hook() wraps builtins.__import__ so every module imported for
+the first time records its cumulative and self (excluding nested imports)
+load time. stage() times initialization steps (index creation, model load...).
+report() returns both, slowest first; it's printed once start-up finishes and
+served at GET /health/startup.
+
+Start-up finishes when the API is up (mark_ready()) and every component
+registered with expect() - the model service, whose joblib / pandas /
+CatBoost imports happen in a worker thread after the API is up - has called
+component_ready(). Only then is the hook removed, so it costs nothing
+afterwards. Disable with STARTUP_TIMING=0.
+"""
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set
+
+STARTUP_TIMING = os.getenv("STARTUP_TIMING", "1") != "0"
+STARTUP_REPORT_TOP = int(os.getenv("STARTUP_REPORT_TOP", "25"))
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ready_at: Optional[float] = None  # API serving
+        self.finished_at: Optional[float] = None  # API serving and every expected component ready
+        self.imports: Dict[str, Dict[str, float]] = {}
+        self.stages: List[Dict[str, Any]] = []
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._orig_import = None
+        self._hook = None
+
+    # ---------- imports ----------
+    def install_import_hook(self):
+        if not STARTUP_TIMING or self._hook is not None:
+            return
+        orig_import = builtins.__import__
+        local = threading.local()  # per-thread stack of nested-import child times
+        imports = self.imports
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            # relative and already-loaded imports are not timed
+            if level or name in sys.modules:
+                return orig_import(name, globals, locals, fromlist, level)
+
+            stack = getattr(local, "stack", None)
+            if stack is None:
+                stack = local.stack = []
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return orig_import(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                imports[name] = {
+                    "cumulative_ms": round(elapsed * 1000, 2),
+                    "self_ms": round((elapsed - children) * 1000, 2),
+                }
+
+        self._orig_import = orig_import
+        self._hook = timed_import
+        builtins.__import__ = timed_import
+
+    def uninstall_import_hook(self):
+        if self._hook is None:
+            return
+        # threads already inside the hook keep using the original they closed over
+        if builtins.__import__ is self._hook:
+            builtins.__import__ = self._orig_import
+        self._hook = None
+        self._orig_import = None
+
+    # ---------- initialization stages ----------
+    @asynccontextmanager
+    async def stage(self, name: str):
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            entry = {"stage": name, "ms": round((time.perf_counter() - start) * 1000, 2)}
+            if error:
+                entry["error"] = error
+            self.stages.append(entry)
+
+    def record_stage(self, name: str, seconds: float):
+        """For steps timed elsewhere (e.g. model load in a worker thread)."""
+        self.stages.append({"stage": name, "ms": round(seconds * 1000, 2)})
+
+    def expect(self, component: str):
+        """Keep timing imports until `component` calls component_ready()."""
+        with self._lock:
+            self._pending.add(component)
+
+    def component_ready(self, component: str):
+        with self._lock:
+            self._pending.discard(component)
+        self._maybe_finish()
+
+    def mark_ready(self):
+        """The API is serving; start-up finishes once expected components are ready too."""
+        self.ready_at = time.perf_counter()
+        self._maybe_finish()
+
+    def _maybe_finish(self):
+        with self._lock:
+            if self.finished_at is not None or self.ready_at is None or self._pending:
+                return
+            self.finished_at = time.perf_counter()
+        self.uninstall_import_hook()
+        self.print_report()
+
+    # ---------- report ----------
+    def report(self, top: int = STARTUP_REPORT_TOP) -> Dict[str, Any]:
+        # top-level packages give the clearest "who costs what" view
+        packages: Dict[str, float] = {}
+        for name, t in self.imports.items():
+            root = name.split(".")[0]
+            packages[root] = packages.get(root, 0.0) + t["self_ms"]
+
+        slowest = sorted(self.imports.items(), key=lambda kv: kv[1]["cumulative_ms"], reverse=True)[:top]
+        return {
+            "total_ms": round(((self.finished_at or time.perf_counter()) - self.started) * 1000, 2),
+            "api_ready_ms": round((self.ready_at - self.started) * 1000, 2) if self.ready_at else None,
+            "ready": self.finished_at is not None,
+            "pending": sorted(self._pending),
+            "imports_by_package_ms": dict(sorted(
+                ((k, round(v, 2)) for k, v in packages.items()), key=lambda kv: kv[1], reverse=True
+            )[:top]),
+            "slowest_imports": [{"module": name, **t} for name, t in slowest],
+            "stages": list(self.stages),
+        }
+
+    def print_report(self):
+        rep = self.report(top=10)
+        print(f"Start-up finished in {rep['total_ms']} ms (API ready after {rep['api_ready_ms']} ms)")
+        for name, ms in rep["imports_by_package_ms"].items():
+            print(f"  import {name:<28} {ms:>9.1f} ms")
+        for s in rep["stages"]:
+            print(f"  init   {s['stage']:<28} {s['ms']:>9.1f} ms" + (f"  ({s['error']})" if s.get("error") else ""))
+
+
+startup_timer = StartupTimer()
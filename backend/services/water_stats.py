@@ -0,0 +1,282 @@
+# backend/services/water_stats.py
+"""
+Materialized water-quality statistics.
+
+Every water report updates one daily bucket per district and one per location
+in `water_quality_stats`. Each bucket keeps, for all eight measured parameters:
+    - Welford running count / mean / M2 (for variance)
+    - min / max
+    - a fixed-bin histogram with an overflow bin (for approximate percentiles)
+    - the number of samples outside the drinking-water limit
+
+Buckets are merged at query time (Chan's parallel variance formula), so any
+time window is answered from a handful of bucket documents instead of the raw
+water_reports collection.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from backend.services.mongo_client import water_col, water_stats_col
+
+# (min, max, bins) for the per-parameter histogram. Values below min go to the
+# first bin; values at or above max are counted in an "over" bin and
+# percentiles landing there are reported as ">max".
+WATER_PARAMETERS: Dict[str, tuple] = {
+    "ph": (0.0, 14.0, 56),
+    "turbidity": (0.0, 400.0, 200),  # field readings run well past 100 NTU
+    "tds": (0.0, 2000.0, 100),
+    "chlorine": (0.0, 5.0, 100),
+    "fluoride": (0.0, 5.0, 100),
+    "nitrate": (0.0, 200.0, 100),
+    "coliform": (0.0, 500.0, 100),
+    "temperature": (0.0, 50.0, 100),
+}
+
+# Drinking-water limits as (lower, upper); None = no bound on that side.
+# Based on BIS IS 10500:2012 acceptable limits (coliform: none detectable).
+DRINKING_WATER_LIMITS: Dict[str, tuple] = {
+    "ph": (6.5, 8.5),
+    "turbidity": (None, 1.0),
+    "tds": (None, 500.0),
+    "chlorine": (0.2, None),      # free residual chlorine, minimum
+    "fluoride": (None, 1.0),
+    "nitrate": (None, 45.0),
+    "coliform": (None, 0.0),
+    "temperature": (None, None),  # no drinking-water limit; stats only
+}
+
+# Histogram layouts of buckets written before the layout was stored with
+# them (as "hist_range"); buckets with a different layout than the current
+# one still count towards mean/std/min/max but not towards percentiles.
+LEGACY_HISTOGRAMS: Dict[str, tuple] = {**WATER_PARAMETERS, "turbidity": (0.0, 50.0, 100)}
+
+PERCENTILES = (50, 90, 95)
+
+
+def _to_float(v) -> Optional[float]:
+    """Convert to float, returning None for missing or non-numeric values."""
+    if v is None or isinstance(v, bool):
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_measurements(water_doc: Dict[str, Any]) -> Dict[str, float]:
+    """Pull the numeric water-quality parameters out of a water report."""
+    values = {}
+    for param in WATER_PARAMETERS:
+        raw = water_doc.get(param)
+        if raw is None and param == "ph":
+            raw = water_doc.get("pH")
+        val = _to_float(raw)
+        if val is not None:
+            values[param] = val
+    return values
+
+
+def _bin_key(param: str, value: float) -> str:
+    lo, hi, bins = WATER_PARAMETERS[param]
+    if value >= hi:
+        return "over"
+    idx = int((value - lo) / (hi - lo) * bins)
+    return f"b{min(max(idx, 0), bins - 1)}"
+
+
+def _exceeds(param: str, value: float) -> bool:
+    low, high = DRINKING_WATER_LIMITS.get(param, (None, None))
+    return (low is not None and value < low) or (high is not None and value > high)
+
+
+def _welford_update_pipeline(values: Dict[str, float], now: datetime) -> List[Dict[str, Any]]:
+    """
+    Build an update pipeline that applies one Welford step per parameter
+    atomically on the server (works with upsert on a missing bucket).
+    """
+    delta_stage, mean_stage, final_stage = {}, {}, {"updated_at": now}
+
+    for p, x in values.items():
+        n_old = {"$ifNull": [f"${p}.n", 0]}
+        mean_old = {"$ifNull": [f"${p}.mean", 0]}
+
+        delta_stage[f"{p}._delta"] = {"$subtract": [x, mean_old]}
+        delta_stage[f"{p}.n"] = {"$add": [n_old, 1]}
+
+        mean_stage[f"{p}.mean"] = {"$add": [mean_old, {"$divide": [f"${p}._delta", f"${p}.n"]}]}
+
+        hist_key = f"{p}.hist.{_bin_key(p, x)}"
+        final_stage[f"{p}.m2"] = {
+            "$add": [
+                {"$ifNull": [f"${p}.m2", 0]},
+                {"$multiply": [f"${p}._delta", {"$subtract": [x, f"${p}.mean"]}]},
+            ]
+        }
+        final_stage[f"{p}.min"] = {"$min": [{"$ifNull": [f"${p}.min", x]}, x]}
+        final_stage[f"{p}.max"] = {"$max": [{"$ifNull": [f"${p}.max", x]}, x]}
+        final_stage[f"{p}.exceed"] = {"$add": [{"$ifNull": [f"${p}.exceed", 0]}, 1 if _exceeds(p, x) else 0]}
+        final_stage[hist_key] = {"$add": [{"$ifNull": [f"${hist_key}", 0]}, 1]}
+        final_stage[f"{p}.hist_range"] = {"$literal": list(WATER_PARAMETERS[p])}
+
+    return [
+        {"$set": delta_stage},
+        {"$set": mean_stage},
+        {"$set": final_stage},
+        {"$unset": [f"{p}._delta" for p in values]},
+    ]
+
+
+async def record_water_quality(water_doc: Dict[str, Any]):
+    """
+    Called whenever a water report is inserted.
+    Folds its measurements into the daily district and location buckets.
+    """
+    values = extract_measurements(water_doc)
+    if not values:
+        return
+
+    created_at = water_doc.get("created_at")
+    if not isinstance(created_at, datetime):
+        created_at = datetime.utcnow()
+    day = datetime(created_at.year, created_at.month, created_at.day)
+
+    pipeline = _welford_update_pipeline(values, datetime.utcnow())
+
+    for scope in ("district", "location"):
+        key = (water_doc.get(scope) or "").strip()
+        if not key:
+            continue
+        await water_stats_col.update_one(
+            {"scope": scope, "key": key, "day": day},
+            pipeline,
+            upsert=True,
+        )
+
+
+def _merge_parameter(param: str, acc: Dict[str, Any], part: Dict[str, Any]):
+    """Combine two partial aggregates (Chan et al. parallel algorithm)."""
+    n_b = part.get("n", 0)
+    if not n_b:
+        return
+    n_a = acc["n"]
+    n = n_a + n_b
+    delta = part["mean"] - acc["mean"]
+    acc["mean"] += delta * n_b / n
+    acc["m2"] += part.get("m2", 0) + delta * delta * n_a * n_b / n
+    acc["n"] = n
+    acc["min"] = part["min"] if acc["min"] is None else min(acc["min"], part["min"])
+    acc["max"] = part["max"] if acc["max"] is None else max(acc["max"], part["max"])
+    acc["exceed"] += part.get("exceed", 0)
+    if tuple(part.get("hist_range") or LEGACY_HISTOGRAMS[param]) != tuple(WATER_PARAMETERS[param]):
+        return
+    acc["hist_n"] += n_b
+    for b, c in (part.get("hist") or {}).items():
+        acc["hist"][b] = acc["hist"].get(b, 0) + c
+
+
+def _approx_percentile(param: str, hist: Dict[str, int], n: int, pct: float):
+    """
+    Linear interpolation inside the histogram bin holding the pct-th sample;
+    ">max" if it falls in the overflow bin.
+    """
+    if not n:
+        return None
+    lo, hi, bins = WATER_PARAMETERS[param]
+    width = (hi - lo) / bins
+    target = pct / 100 * n
+    seen = 0
+    for i in range(bins):
+        c = hist.get(f"b{i}", 0)
+        if c and seen + c >= target:
+            return lo + width * (i + (target - seen) / c)
+        seen += c
+    return f">{hi:g}"
+
+
+def _summarize(param: str, acc: Dict[str, Any]) -> Dict[str, Any]:
+    n = acc["n"]
+    low, high = DRINKING_WATER_LIMITS.get(param, (None, None))
+    has_limit = low is not None or high is not None
+    return {
+        "count": n,
+        "mean": round(acc["mean"], 3) if n else None,
+        "std": round((acc["m2"] / (n - 1)) ** 0.5, 3) if n > 1 else None,
+        "min": acc["min"],
+        "max": acc["max"],
+        "percentiles": {
+            f"p{p}": (round(v, 3) if isinstance(v, float) else v)
+            for p in PERCENTILES
+            for v in [_approx_percentile(param, acc["hist"], acc["hist_n"], p)]
+        },
+        "limit": {"min": low, "max": high} if has_limit else None,
+        "exceedance_rate": round(acc["exceed"] / n, 4) if n and has_limit else None,
+    }
+
+
+async def get_water_quality_stats(
+    scope: str,
+    key: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Merge the daily buckets for a district/location between start and end
+    (inclusive, day granularity) into per-parameter statistics.
+    """
+    query: Dict[str, Any] = {"scope": scope, "key": key}
+    day_filter = {}
+    if start:
+        day_filter["$gte"] = datetime(start.year, start.month, start.day)
+    if end:
+        day_filter["$lte"] = datetime(end.year, end.month, end.day)
+    if day_filter:
+        query["day"] = day_filter
+
+    totals = {
+        p: {"n": 0, "mean": 0.0, "m2": 0.0, "min": None, "max": None, "exceed": 0, "hist": {}, "hist_n": 0}
+        for p in WATER_PARAMETERS
+    }
+    buckets = 0
+
+    async for bucket in water_stats_col.find(query):
+        buckets += 1
+        for p in WATER_PARAMETERS:
+            if isinstance(bucket.get(p), dict):
+                _merge_parameter(p, totals[p], bucket[p])
+
+    return {
+        "scope": scope,
+        "key": key,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "days_with_data": buckets,
+        "parameters": {p: _summarize(p, acc) for p, acc in totals.items()},
+    }
+
+
+async def rebuild_water_quality_stats(days: Optional[int] = None) -> int:
+    """
+    Rebuild buckets from water_reports (one-off backfill for existing data).
+    Returns the number of water reports folded in.
+    """
+    query: Dict[str, Any] = {}
+    if days:
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        cutoff_day = datetime(cutoff.year, cutoff.month, cutoff.day)
+        query["created_at"] = {"$gte": cutoff_day}
+        await water_stats_col.delete_many({"day": {"$gte": cutoff_day}})
+    else:
+        await water_stats_col.delete_many({})
+
+    processed = 0
+    async for doc in water_col.find(query):
+        await record_water_quality(doc)
+        processed += 1
+    return processed
+
+
+if __name__ == "__main__":
+    # Run: python -m backend.services.water_stats
+    import asyncio
+    count = asyncio.run(rebuild_water_quality_stats())
+    print(f"Rebuilt water quality stats from {count} water reports")
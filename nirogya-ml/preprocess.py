@@ -1,50 +1,140 @@
 # preprocess.py
-import pandas as pd
-import json
+"""
+Vectorized, chunked preprocessing of the household survey CSV.
+
+The CSV is streamed in chunks (memory stays flat regardless of file size):
+  1. symptoms_list JSON strings are parsed once per chunk and turned into all
+     symptom flags in a single multi-hot pass
+  2. district / primary_water_source are one-hot encoded against category
+     sets collected up front, so every chunk produces the same columns
+  3. unused text columns are dropped and the chunk is appended to a Parquet
+     file as one row group
+
+    python preprocess.py [--input dataset/nirogya_1000_household_dataset.csv]
+                         [--output dataset/processed_dataset.parquet] [--chunksize 200000] [--csv]
+"""
 import os
+import time
+import argparse
+import itertools
 
-INPUT_PATH = "./dataset/nirogya_1000_household_dataset.csv"
-OUTPUT_PATH = "./dataset/processed_dataset.csv"
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-print("Loading:", INPUT_PATH)
-df = pd.read_csv(INPUT_PATH)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # nirogya-ml/
+INPUT_PATH = os.path.join(BASE_DIR, "dataset", "nirogya_1000_household_dataset.csv")
+OUTPUT_PATH = os.path.join(BASE_DIR, "dataset", "processed_dataset.parquet")
+CHUNKSIZE = 200_000
+
+SYMPTOMS = [
+    "diarrhea", "vomiting", "fever", "abdominal_pain",
+    "jaundice", "dehydration", "fatigue", "nausea", "headache"
+]
+# Spelling used inside symptoms_list ("abdominal pain")
+SYMPTOM_NAMES = [s.replace("_", " ") for s in SYMPTOMS]
 
-print("Initial shape:", df.shape)
-print("Columns:", df.columns.tolist())
+CATEGORICAL = ["district", "primary_water_source"]
+DROP_COLUMNS = ["household_id", "location", "symptoms_list"]
 
-# -----------------------------
-# 1. Convert symptoms_list (string) → list
-# -----------------------------
-def safe_load(x):
-    try:
-        return json.loads(x)
-    except:
-        return []
+# Items of a JSON string list: '["Fever", "Vomiting"]' -> ['fever', 'vomiting']
+_JSON_ITEM = r'"((?:[^"\\]|\\.)*)"'
 
-df["symptoms_list"] = df["symptoms_list"].apply(safe_load)
 
 # -----------------------------
-# 2. Create symptom flags
+# 1. Symptom flags (multi-hot)
 # -----------------------------
-symptoms = [
-    "diarrhea", "vomiting", "fever", "abdominal_pain",
-    "jaundice", "dehydration", "fatigue", "nausea", "headache"
-]
+def symptom_flags(symptoms_list: pd.Series) -> pd.DataFrame:
+    """One multi-hot pass: parse every list once, then scatter into a flag matrix."""
+    lists = symptoms_list.fillna("").astype(str).str.lower().str.findall(_JSON_ITEM)
+    lengths = lists.str.len().to_numpy()
+    items = list(itertools.chain.from_iterable(lists))
+
+    codes = pd.Categorical(items, categories=SYMPTOM_NAMES).codes
+    rows = np.repeat(np.arange(len(lists)), lengths)
+    known = codes >= 0
+
+    flags = np.zeros((len(lists), len(SYMPTOMS)), dtype=np.uint8)
+    flags[rows[known], codes[known]] = 1
+    return pd.DataFrame(flags, index=symptoms_list.index, columns=[f"symptom_{s}" for s in SYMPTOMS])
 
-for s in symptoms:
-    df[f"symptom_{s}"] = df["symptoms_list"].apply(lambda lst: 1 if s.replace("_", " ") in [x.lower() for x in lst] else 0)
 
 # -----------------------------
-# 3. Encode categorical
+# 2. Categorical encoding
 # -----------------------------
-df = pd.get_dummies(df, columns=["district", "primary_water_source"], drop_first=True)
+def collect_categories(path: str, chunksize: int) -> dict:
+    """Distinct values of each categorical column (streams only those columns)."""
+    seen = {c: set() for c in CATEGORICAL}
+    for chunk in pd.read_csv(path, usecols=CATEGORICAL, chunksize=chunksize, dtype=str):
+        for c in CATEGORICAL:
+            seen[c].update(chunk[c].dropna().unique())
+    return {c: sorted(values) for c, values in seen.items()}
+
+
+def encode_categoricals(df: pd.DataFrame, categories: dict) -> pd.DataFrame:
+    for c in CATEGORICAL:
+        df[c] = pd.Categorical(df[c], categories=categories[c])
+    return pd.get_dummies(df, columns=CATEGORICAL, drop_first=True)
+
 
 # -----------------------------
-# 4. Remove unused text columns
+# Pipeline
 # -----------------------------
-df.drop(columns=["household_id", "location", "symptoms_list"], inplace=True)
+def process_chunk(chunk: pd.DataFrame, categories: dict) -> pd.DataFrame:
+    flags = symptom_flags(chunk["symptoms_list"])
+    chunk = chunk.drop(columns=DROP_COLUMNS)
+    chunk = pd.concat([chunk, flags], axis=1)
+    return encode_categoricals(chunk, categories)
+
+
+def run(input_path=INPUT_PATH, output_path=OUTPUT_PATH, chunksize=CHUNKSIZE, as_csv=False):
+    start = time.perf_counter()
+    print("Loading:", input_path)
+
+    categories = collect_categories(input_path, chunksize)
+    print("Categories:", {c: len(v) for c, v in categories.items()})
+
+    writer = None
+    dtypes = None
+    rows = 0
+    try:
+        for i, chunk in enumerate(pd.read_csv(input_path, chunksize=chunksize)):
+            out = process_chunk(chunk, categories)
+
+            # pin dtypes to the first chunk's (ints stay nullable ints even if a later chunk has gaps)
+            if dtypes is None:
+                dtypes = {
+                    c: ("Int64" if t == np.int64 else t)
+                    for c, t in out.dtypes.items()
+                }
+                print("Columns:", list(dtypes))
+            out = out.astype(dtypes)
+
+            if as_csv:
+                out.to_csv(output_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+            else:
+                table = pa.Table.from_pandas(out, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema, compression="snappy")
+                writer.write_table(table)
+            rows += len(out)
+            print(f"  chunk {i + 1}: {rows} rows")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(f"Processed {rows} rows in {time.perf_counter() - start:.2f}s")
+    print("Saved to:", output_path)
+
 
-print("Processed shape:", df.shape)
-print("Saving to:", OUTPUT_PATH)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preprocess the household survey dataset")
+    parser.add_argument("--input", default=INPUT_PATH)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument("--csv", action="store_true", help="write CSV instead of Parquet")
+    args = parser.parse_args()
 
-df.to_csv(OUTPUT_PATH, index=False)
+    output = args.output or (OUTPUT_PATH[:-len(".parquet")] + ".csv" if args.csv else OUTPUT_PATH)
+    run(args.input, output, args.chunksize, as_csv=args.csv)
@@ -0,0 +1,349 @@
+# retrain_incremental.py
+"""
+Incremental retraining from confirmed cases in MongoDB.
+
+1. export  - stream prediction_reports that carry a confirmed_disease (set via
+             POST /api/predictions/{id}/confirm) in chunks, in confirmation
+             order, into Parquet part files under cache/labelled_cases/.
+             A checkpoint (confirmed_at, _id) makes each run append only the
+             new cases. About 10% of cases, picked by a hash of their id, go to
+             a validation part set.
+2. train   - continue boosting from the current backend model one part file at
+             a time (CatBoost init_model), so memory is bounded by the chunk
+             size, not the number of accumulated cases. With --from-scratch (or
+             when continuing isn't possible) the first part starts a fresh model.
+3. hand-off - the result is written into the backend model registry as a new
+             version (model + label encoder metadata + metadata.json) and,
+             with --promote, made the active version for every backend worker.
+
+    python retrain_incremental.py [--chunk-size 50000] [--iterations-per-chunk 50]
+                                  [--version v2026_10_18] [--from-scratch] [--promote]
+"""
+import os
+import re
+import json
+import zlib
+import argparse
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from sklearn.preprocessing import LabelEncoder
+from catboost import CatBoostClassifier, CatBoostError
+
+from train_model import BASE_DIR, REGISTRY_DIR, save_artifacts
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGO_URI") or "mongodb://localhost:27017"
+DB_NAME = os.getenv("MONGO_DB") or os.getenv("DB_NAME") or "nirogya_db"
+
+CACHE_DIR = os.path.join(BASE_DIR, "cache", "labelled_cases")
+TRAIN_DIR = os.path.join(CACHE_DIR, "train")
+VALID_DIR = os.path.join(CACHE_DIR, "valid")
+STATE_PATH = os.path.join(CACHE_DIR, "state.json")
+
+BACKEND_MODELS_DIR = os.path.join(BASE_DIR, "..", "backend", "models")
+VALIDATION_BUCKETS = 10  # 1 in 10 cases held out
+
+LABEL_COL = "disease_label"
+
+
+# =====================================================
+# Current backend model
+# =====================================================
+
+def active_version(db):
+    """Active registry version: shared Mongo pointer, else ACTIVE file, else the legacy model."""
+    pointer = db["model_state"].find_one({"_id": "active"})
+    if pointer and pointer.get("version"):
+        return pointer["version"]
+    active_file = os.path.join(REGISTRY_DIR, "ACTIVE")
+    if os.path.exists(active_file):
+        with open(active_file, encoding="utf-8") as f:
+            version = f.read().strip()
+        if version:
+            return version
+    return "legacy"
+
+
+def load_current_model(version):
+    base = BACKEND_MODELS_DIR if version == "legacy" else os.path.join(REGISTRY_DIR, version)
+    model = joblib.load(os.path.join(base, "disease_prediction_model.joblib"))
+    meta = joblib.load(os.path.join(base, "label_encoder.joblib"))
+    metadata = {}
+    metadata_path = os.path.join(base, "metadata.json")
+    if os.path.exists(metadata_path):
+        with open(metadata_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+    return model, meta, metadata
+
+
+# =====================================================
+# Export: Mongo -> Parquet parts
+# =====================================================
+
+def _load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    return {"last_confirmed_at": None, "last_id": None, "next_part": 0, "rows": 0}
+
+
+def _save_state(state):
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_PATH)
+
+
+def _feature_vector(doc):
+    # merger.py stores features.feature_vector, /predict stores prediction.features_used
+    return ((doc.get("features") or {}).get("feature_vector")
+            or (doc.get("prediction") or {}).get("features_used"))
+
+
+def _write_part(rows, feature_cols, cat_cols, directory, part):
+    df = pd.DataFrame.from_records(rows, columns=feature_cols + [LABEL_COL])
+    for c in cat_cols:
+        df[c] = df[c].fillna("").astype(str)
+    num_cols = [c for c in feature_cols if c not in cat_cols]
+    df[num_cols] = df[num_cols].apply(pd.to_numeric, errors="coerce").fillna(0.0).astype("float64")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False),
+                   os.path.join(directory, f"part-{part:05d}.parquet"))
+
+
+def normalize_label(disease) -> str:
+    """Same spelling as the confirm endpoint: "Hepatitis A" -> "hepatitis_a"."""
+    return re.sub(r"[\s\-]+", "_", str(disease).strip().lower())
+
+
+def export_cases(db, feature_cols, cat_cols, chunk_size):
+    """Append newly confirmed cases to the columnar cache. Returns the number of rows added."""
+    from bson import ObjectId
+
+    os.makedirs(TRAIN_DIR, exist_ok=True)
+    os.makedirs(VALID_DIR, exist_ok=True)
+    state = _load_state()
+
+    query = {"confirmed_disease": {"$exists": True, "$ne": None}, "confirmed_at": {"$exists": True}}
+    if state["last_confirmed_at"]:
+        last_at = datetime.fromisoformat(state["last_confirmed_at"])
+        last_id = ObjectId(state["last_id"])
+        query["$or"] = [
+            {"confirmed_at": {"$gt": last_at}},
+            {"confirmed_at": last_at, "_id": {"$gt": last_id}},
+        ]
+    projection = {"confirmed_disease": 1, "confirmed_at": 1,
+                  "features.feature_vector": 1, "prediction.features_used": 1}
+    cursor = (db["prediction_reports"].find(query, projection)
+              .sort([("confirmed_at", 1), ("_id", 1)])
+              .batch_size(min(chunk_size, 10_000)))
+
+    added = 0
+    buffers = {TRAIN_DIR: [], VALID_DIR: []}
+
+    def flush(last_doc):
+        # both buffers go to disk together so the checkpoint never skips or repeats rows
+        nonlocal added
+        for directory, rows in buffers.items():
+            if rows:
+                _write_part(rows, feature_cols, cat_cols, directory, state["next_part"])
+                state["next_part"] += 1
+                added += len(rows)
+                state["rows"] += len(rows)
+                buffers[directory] = []
+        state["last_confirmed_at"] = last_doc["confirmed_at"].isoformat()
+        state["last_id"] = str(last_doc["_id"])
+        _save_state(state)
+
+    last_doc = None
+    for doc in cursor:
+        last_doc = doc
+        vector = _feature_vector(doc)
+        if not vector:
+            continue
+        row = [vector.get(c) for c in feature_cols] + [normalize_label(doc["confirmed_disease"])]
+        bucket = zlib.crc32(str(doc["_id"]).encode()) % VALIDATION_BUCKETS
+        buffers[VALID_DIR if bucket == 0 else TRAIN_DIR].append(row)
+        if len(buffers[TRAIN_DIR]) + len(buffers[VALID_DIR]) >= chunk_size:
+            flush(last_doc)
+
+    if last_doc is not None:
+        flush(last_doc)
+    return added
+
+
+def _parts(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".parquet"))
+
+
+def _part_number(path):
+    return int(os.path.basename(path)[len("part-"):-len(".parquet")])
+
+
+def scan_labels(parts):
+    """Distinct labels across parts, reading only the label column."""
+    labels = set()
+    for path in parts:
+        labels.update(pq.read_table(path, columns=[LABEL_COL]).column(LABEL_COL).to_pylist())
+    return labels
+
+
+# =====================================================
+# Train: chunk-by-chunk boosting
+# =====================================================
+
+def _read_part(path, feature_cols, le):
+    df = pd.read_parquet(path)
+    df = df[df[LABEL_COL].isin(le.classes_)]
+    return df[feature_cols], le.transform(df[LABEL_COL])
+
+
+def evaluate(model, parts, feature_cols, le):
+    """Accuracy over the validation parts, streamed one part at a time."""
+    correct = total = 0
+    for path in parts:
+        X, y = _read_part(path, feature_cols, le)
+        if len(y) == 0:
+            continue
+        pred = np.asarray(model.predict(X)).reshape(-1).astype(int)
+        correct += int((pred == y).sum())
+        total += len(y)
+    return (correct / total if total else None), total
+
+
+def train_incremental(parts, feature_cols, cat_cols, le, init_model, iterations_per_chunk, params):
+    cat_idx = [feature_cols.index(c) for c in cat_cols]
+    model = init_model
+    for i, path in enumerate(parts):
+        X, y = _read_part(path, feature_cols, le)
+        if len(y) == 0:
+            continue
+        next_model = CatBoostClassifier(
+            iterations=iterations_per_chunk,
+            loss_function="MultiClass",
+            class_names=list(range(len(le.classes_))),
+            random_seed=42,
+            verbose=False,
+            **params,
+        )
+        next_model.fit(X, y, cat_features=cat_idx, init_model=model)
+        model = next_model
+        print(f"  chunk {i + 1}/{len(parts)}: {len(y)} rows, {model.tree_count_} trees")
+        del X, y
+    return model
+
+
+def retrain(chunk_size, iterations_per_chunk, version, from_scratch, promote, min_gain):
+    db = MongoClient(MONGO_URI)[DB_NAME]
+
+    current_version = active_version(db)
+    current_model, meta, current_metadata = load_current_model(current_version)
+    feature_cols, cat_cols = meta["feature_cols"], meta["categorical_cols"]
+    print(f"Current model: {current_version} ({current_model.tree_count_} trees)")
+
+    added = export_cases(db, feature_cols, cat_cols, chunk_size)
+    train_parts, valid_parts = _parts(TRAIN_DIR), _parts(VALID_DIR)
+    print(f"Exported {added} new confirmed cases; cache holds {_load_state()['rows']} rows "
+          f"in {len(train_parts)} train / {len(valid_parts)} validation parts")
+    if not train_parts:
+        print("No labelled cases to train on.")
+        return None
+
+    le = meta["label_encoder"]
+    new_labels = scan_labels(train_parts) - set(le.classes_)
+    params = {k: v for k, v in current_model.get_params().items()
+              if k in ("depth", "learning_rate", "l2_leaf_reg", "border_count")}
+
+    init_model = current_model
+    if from_scratch or new_labels:
+        if new_labels and not from_scratch:
+            print(f"New labels {sorted(new_labels)} are not in the current model; training from scratch")
+        le = LabelEncoder().fit(sorted(set(le.classes_) | scan_labels(train_parts)))
+        init_model = None
+    all_train_parts = train_parts
+    if init_model is not None:
+        # the current model has already learned the parts it was trained through
+        seen = current_metadata.get("trained_through_part", -1)
+        train_parts = [p for p in train_parts if _part_number(p) > seen]
+        if not train_parts:
+            print(f"{current_version} is already trained on every cached case.")
+            return None
+
+    print("Training...")
+    try:
+        model = train_incremental(train_parts, feature_cols, cat_cols, le, init_model, iterations_per_chunk, params)
+    except CatBoostError as e:
+        if init_model is None:
+            raise
+        print(f"Can't continue from {current_version} ({e}); training from scratch")
+        model = train_incremental(all_train_parts, feature_cols, cat_cols, le, None, iterations_per_chunk, params)
+        init_model = None
+
+    new_acc, n_valid = evaluate(model, valid_parts, feature_cols, le)
+    old_acc = None
+    if init_model is not None:
+        old_acc, _ = evaluate(current_model, valid_parts, feature_cols, le)
+    print(f"Validation ({n_valid} rows): new={new_acc}  current={old_acc}")
+    if new_acc is not None and old_acc is not None and new_acc < old_acc + min_gain:
+        print("New model does not beat the current model; not registering it.")
+        return None
+
+    version = version or datetime.utcnow().strftime("v%Y%m%d%H%M%S")
+    version_dir = os.path.join(REGISTRY_DIR, version)
+    os.makedirs(version_dir, exist_ok=True)
+    save_artifacts(model, le, feature_cols, cat_cols,
+                   model_path=os.path.join(version_dir, "disease_prediction_model.joblib"),
+                   encoder_path=os.path.join(version_dir, "label_encoder.joblib"))
+    metadata = {
+        "trained_at": datetime.utcnow().isoformat(),
+        "source": "retrain_incremental.py",
+        "parent_version": current_version if init_model is not None else None,
+        "training_rows": _load_state()["rows"],
+        "trained_through_part": _part_number(all_train_parts[-1]),
+        "validation_rows": n_valid,
+        "validation_accuracy": new_acc,
+        "parent_validation_accuracy": old_acc,
+        "trees": model.tree_count_,
+    }
+    with open(os.path.join(version_dir, "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    print(f"Registered model version {version}")
+
+    if promote:
+        # every backend worker picks this up on its next registry poll
+        now = datetime.utcnow()
+        db["model_state"].update_one(
+            {"_id": "active"},
+            {"$set": {"version": version, "promoted_at": now, "promoted_by": "retrain_incremental"},
+             "$push": {"history": {"$each": [{"version": version, "previous": current_version,
+                                              "promoted_at": now, "promoted_by": "retrain_incremental"}],
+                                   "$slice": -50}}},
+            upsert=True,
+        )
+        print(f"Promoted {version} to active")
+    else:
+        print(f"Promote with: POST /api/admin/models/{version}/promote")
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrain the disease model from confirmed cases in MongoDB")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per Parquet part / training chunk")
+    parser.add_argument("--iterations-per-chunk", type=int, default=50)
+    parser.add_argument("--version", default=None, help="registry version name (default: timestamp)")
+    parser.add_argument("--from-scratch", action="store_true", help="don't continue from the current model")
+    parser.add_argument("--promote", action="store_true", help="make the new version active")
+    parser.add_argument("--min-gain", type=float, default=0.0,
+                        help="required validation accuracy gain over the current model")
+    args = parser.parse_args()
+    retrain(args.chunk_size, args.iterations_per_chunk, args.version,
+            args.from_scratch, args.promote, args.min_gain)
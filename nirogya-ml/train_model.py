@@ -1,10 +1,19 @@
 import os
+import json
+import time
+import random
+import shutil
+import argparse
+import itertools
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import joblib
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report
-from catboost import CatBoostClassifier
+from catboost import CatBoostClassifier, Pool
 
 # === Paths ===
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))          # nirogya-ml/
@@ -14,6 +23,24 @@ os.makedirs(MODELS_DIR, exist_ok=True)
 
 MODEL_PATH = os.path.join(MODELS_DIR, "disease_prediction_model.joblib")
 LABEL_ENCODER_PATH = os.path.join(MODELS_DIR, "label_encoder.joblib")
+SEARCH_RESULTS_PATH = os.path.join(MODELS_DIR, "search_results.json")
+QUANTIZED_POOL_PATH = os.path.join(MODELS_DIR, "train_pool.quantized")
+
+# Backend model registry (see backend/services/predictor.py)
+REGISTRY_DIR = os.path.join(BASE_DIR, "..", "backend", "models", "registry")
+
+# Hyperparameter search space
+PARAM_GRID = {
+    "depth": [4, 6, 8],
+    "learning_rate": [0.03, 0.1, 0.2],
+    "l2_leaf_reg": [1, 3, 9],
+    "border_count": [128, 254],
+}
+SEARCH_ITERATIONS = 1000
+EARLY_STOPPING_ROUNDS = 50
+# Share of each training fold held out for early stopping; the validation
+# fold itself is only used for scoring
+EARLY_STOPPING_FRACTION = 0.15
 
 def load_data():
     df = pd.read_csv(DATA_PATH)
@@ -105,18 +132,216 @@ def train():
     )
 
     # Save model + label encoder + feature order
-    joblib.dump(model, MODEL_PATH)
+    save_artifacts(model, le, feature_cols, cat_cols)
+
+
+def save_artifacts(model, le, feature_cols, cat_cols, model_path=MODEL_PATH, encoder_path=LABEL_ENCODER_PATH):
+    """Write the model + label encoder/feature metadata in the format the backend loads."""
+    joblib.dump(model, model_path)
     joblib.dump(
         {
             "label_encoder": le,
             "feature_cols": feature_cols,
             "categorical_cols": cat_cols,
         },
-        LABEL_ENCODER_PATH,
+        encoder_path,
+    )
+
+    print(f"\nSaved model to: {model_path}")
+    print(f"Saved label encoder + metadata to: {encoder_path}")
+
+
+def register_version(version, metadata):
+    """Copy the saved artifacts into the backend registry as <version>/ (promote via the admin API)."""
+    version_dir = os.path.join(REGISTRY_DIR, version)
+    os.makedirs(version_dir, exist_ok=True)
+    shutil.copy2(MODEL_PATH, os.path.join(version_dir, "disease_prediction_model.joblib"))
+    shutil.copy2(LABEL_ENCODER_PATH, os.path.join(version_dir, "label_encoder.joblib"))
+    with open(os.path.join(version_dir, "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, default=str)
+    print(f"Registered model version {version} in {os.path.abspath(version_dir)}")
+
+
+# =====================================================
+# Cross-validated hyperparameter search
+# =====================================================
+
+def build_quantized_pool(X, y, cat_cols, feature_cols, border_count):
+    """Quantize the dataset once and save it; every trial/fold reuses the file."""
+    pool = Pool(X, y, cat_features=[feature_cols.index(c) for c in cat_cols])
+    pool.quantize(border_count=border_count)
+    path = f"{QUANTIZED_POOL_PATH}.{border_count}"
+    pool.save(path)
+    return path
+
+
+def _run_fold(trial_id, params, fold, fit_idx, stop_idx, val_idx, pool_path, thread_count):
+    """
+    One (trial, fold) job. Runs in a worker process. Early stopping watches
+    stop_idx (carved out of the training fold), so the iteration count is not
+    chosen on the val_idx rows the fold is scored on.
+    """
+    pool = Pool("quantized://" + pool_path)
+    train_pool = pool.slice(fit_idx)
+    stop_pool = pool.slice(stop_idx)
+    val_pool = pool.slice(val_idx)
+
+    model = CatBoostClassifier(
+        iterations=SEARCH_ITERATIONS,
+        depth=params["depth"],
+        learning_rate=params["learning_rate"],
+        l2_leaf_reg=params["l2_leaf_reg"],
+        loss_function="MultiClass",
+        eval_metric="Accuracy",
+        random_seed=42,
+        thread_count=thread_count,
+        verbose=False,
+    )
+    start = time.perf_counter()
+    model.fit(train_pool, eval_set=stop_pool, early_stopping_rounds=EARLY_STOPPING_ROUNDS, use_best_model=True)
+    train_seconds = time.perf_counter() - start
+
+    y_pred = model.predict(val_pool).reshape(-1).astype(int)
+    acc = accuracy_score(val_pool.get_label(), y_pred)
+    best_iteration = model.get_best_iteration()  # 0-based; None if nothing was evaluated
+    return {
+        "trial": trial_id,
+        "fold": fold,
+        "accuracy": float(acc),
+        "best_iteration": None if best_iteration is None else int(best_iteration),
+        "tree_count": int(model.tree_count_),
+        "train_seconds": round(train_seconds, 3),
+    }
+
+
+def sample_trials(n_trials, seed=42):
+    grid = [dict(zip(PARAM_GRID, values)) for values in itertools.product(*PARAM_GRID.values())]
+    if n_trials and n_trials < len(grid):
+        grid = random.Random(seed).sample(grid, n_trials)
+    return grid
+
+
+def search(folds=5, n_trials=12, workers=None, register=None):
+    print("Loading data from:", DATA_PATH)
+    X, y, cat_cols, feature_cols = load_data()
+    le = LabelEncoder()
+    y_encoded = le.fit_transform(y)
+
+    trials = sample_trials(n_trials)
+    workers = workers or os.cpu_count() or 1
+    thread_count = max(1, (os.cpu_count() or 1) // workers)
+
+    # Quantize once per border_count used by the sampled trials
+    pool_paths = {
+        bc: build_quantized_pool(X, y_encoded, cat_cols, feature_cols, bc)
+        for bc in sorted({t["border_count"] for t in trials})
+    }
+    splits = []
+    for train_idx, val_idx in StratifiedKFold(n_splits=folds, shuffle=True, random_state=42).split(X, y_encoded):
+        fit_idx, stop_idx = train_test_split(
+            train_idx, test_size=EARLY_STOPPING_FRACTION, random_state=42, stratify=y_encoded[train_idx],
+        )
+        splits.append((fit_idx, stop_idx, val_idx))
+
+    print(f"Running {len(trials)} trials x {folds} folds on {workers} workers ({thread_count} threads each)...")
+    results = []
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _run_fold, trial_id, params, fold,
+                fit_idx.tolist(), stop_idx.tolist(), val_idx.tolist(),
+                pool_paths[params["border_count"]], thread_count,
+            )
+            for trial_id, params in enumerate(trials)
+            for fold, (fit_idx, stop_idx, val_idx) in enumerate(splits)
+        ]
+        for future in as_completed(futures):
+            r = future.result()
+            results.append(r)
+            print(f"  trial {r['trial']:>2} fold {r['fold']}: acc={r['accuracy']:.4f} ({r['train_seconds']}s)")
+    wall_seconds = time.perf_counter() - wall_start
+
+    # Aggregate per trial
+    summary = []
+    for trial_id, params in enumerate(trials):
+        rows = [r for r in results if r["trial"] == trial_id]
+        accs = [r["accuracy"] for r in rows]
+        summary.append({
+            "trial": trial_id,
+            "params": params,
+            "mean_accuracy": float(np.mean(accs)),
+            "std_accuracy": float(np.std(accs)),
+            # trees kept by early stopping (best_iteration is 0-based)
+            "mean_tree_count": int(round(np.mean([
+                r["tree_count"] if r["best_iteration"] is None else r["best_iteration"] + 1 for r in rows
+            ]))),
+            "train_seconds": round(sum(r["train_seconds"] for r in rows), 3),
+            "folds": sorted(rows, key=lambda r: r["fold"]),
+        })
+    summary.sort(key=lambda t: (-t["mean_accuracy"], t["train_seconds"]))
+    best = summary[0]
+
+    print(f"\nSearch finished in {wall_seconds:.1f}s wall time")
+    for t in summary[:5]:
+        print(f"  trial {t['trial']:>2}: {t['mean_accuracy']:.4f} +/- {t['std_accuracy']:.4f}  {t['params']}")
+
+    # Refit the best configuration on all rows
+    params = best["params"]
+    model = CatBoostClassifier(
+        iterations=max(best["mean_tree_count"], 1),
+        depth=params["depth"],
+        learning_rate=params["learning_rate"],
+        l2_leaf_reg=params["l2_leaf_reg"],
+        border_count=params["border_count"],
+        loss_function="MultiClass",
+        eval_metric="Accuracy",
+        random_seed=42,
+        verbose=False,
     )
+    # Raw (not quantized) data, so the exported model keeps the original
+    # categorical values and applies to the backend's raw feature rows
+    print(f"\nRefitting best configuration on the full dataset: {params}")
+    model.fit(X, y_encoded, cat_features=[feature_cols.index(c) for c in cat_cols])
+    save_artifacts(model, le, feature_cols, cat_cols)
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "folds": folds,
+        "workers": workers,
+        "wall_seconds": round(wall_seconds, 3),
+        "best": {k: v for k, v in best.items() if k != "folds"},
+        "trials": summary,
+    }
+    with open(SEARCH_RESULTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved search results to: {SEARCH_RESULTS_PATH}")
+
+    if register:
+        register_version(register, {
+            "trained_at": report["created_at"],
+            "source": "train_model.py search",
+            "params": params,
+            "iterations": model.tree_count_,
+            "cv_accuracy": best["mean_accuracy"],
+            "cv_accuracy_std": best["std_accuracy"],
+            "folds": folds,
+        })
+    return report
 
-    print(f"\nSaved model to: {MODEL_PATH}")
-    print(f"Saved label encoder + metadata to: {LABEL_ENCODER_PATH}")
 
 if __name__ == "__main__":
-    train()
+    parser = argparse.ArgumentParser(description="Train the disease prediction model")
+    sub = parser.add_subparsers(dest="command")
+    search_parser = sub.add_parser("search", help="parallel cross-validated hyperparameter search")
+    search_parser.add_argument("--folds", type=int, default=5)
+    search_parser.add_argument("--trials", type=int, default=12, help="sampled configurations (0 = full grid)")
+    search_parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    search_parser.add_argument("--register", metavar="VERSION", default=None,
+                               help="also copy the best model into the backend registry as VERSION")
+    args = parser.parse_args()
+
+    if args.command == "search":
+        search(folds=args.folds, n_trials=args.trials, workers=args.workers, register=args.register)
+    else:
+        train()